@@ -1,41 +1,20 @@
 import streamlit as st
-from langchain_community.document_loaders import YoutubeLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_groq import ChatGroq
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
 import os
-import re
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from dotenv import load_dotenv
-from pytube import YouTube
-import requests
-import random
 import time
-from urllib.parse import urlparse
-import json
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from typing import Optional, Dict, Any
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
-from bs4 import BeautifulSoup
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Configure Google Gemini
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+from typing import Optional, Dict, TYPE_CHECKING
+from jobs import Job, QueueFull, get_job_queue
+from languages import SUPPORTED_LANGUAGES
+from youtube import extract_video_id, invalidate_video_probe, probe_video
+
+if TYPE_CHECKING:
+    from metrics import RunTrace
+    from summarizer import TokenUsage
 
 # Initialize session state
 if 'summary' not in st.session_state:
     st.session_state.summary = None
-if 'translated_summary' not in st.session_state:
-    st.session_state.translated_summary = None
+if 'translations' not in st.session_state:
+    st.session_state.translations = None
 if 'url' not in st.session_state:
     st.session_state.url = None
 if 'language_code' not in st.session_state:
@@ -44,530 +23,130 @@ if 'url_input' not in st.session_state:
     st.session_state.url_input = ""
 if 'user_api_key' not in st.session_state:
     st.session_state.user_api_key = ""
-
-# List of supported languages for translation
-SUPPORTED_LANGUAGES = [
-    {"name": "English", "code": "en"},
-    {"name": "Bengali", "code": "bn"},
-    {"name": "Hindi", "code": "hi"},
-    {"name": "Spanish", "code": "es"},
-    {"name": "French", "code": "fr"},
-    {"name": "German", "code": "de"},
-    {"name": "Italian", "code": "it"},
-    {"name": "Portuguese", "code": "pt"},
-    {"name": "Russian", "code": "ru"},
-    {"name": "Japanese", "code": "ja"},
-    {"name": "Korean", "code": "ko"},
-    {"name": "Chinese (Simplified)", "code": "zh"},
-    {"name": "Arabic", "code": "ar"},
-    {"name": "Dutch", "code": "nl"},
-    {"name": "Turkish", "code": "tr"},
-    {"name": "Polish", "code": "pl"},
-    {"name": "Ukrainian", "code": "uk"},
-    {"name": "Vietnamese", "code": "vi"},
-    {"name": "Thai", "code": "th"},
-    {"name": "Indonesian", "code": "id"},
-    {"name": "Malay", "code": "ms"},
-    {"name": "Swedish", "code": "sv"},
-    {"name": "Norwegian", "code": "no"},
-    {"name": "Danish", "code": "da"},
-    {"name": "Finnish", "code": "fi"},
-    {"name": "Greek", "code": "el"},
-    {"name": "Hebrew", "code": "he"},
-    {"name": "Romanian", "code": "ro"},
-    {"name": "Hungarian", "code": "hu"},
-    {"name": "Czech", "code": "cs"},
-    {"name": "Slovak", "code": "sk"},
-    {"name": "Croatian", "code": "hr"},
-    {"name": "Serbian", "code": "sr"},
-    {"name": "Bulgarian", "code": "bg"},
-    {"name": "Slovenian", "code": "sl"},
-    {"name": "Estonian", "code": "et"},
-    {"name": "Latvian", "code": "lv"},
-    {"name": "Lithuanian", "code": "lt"},
-    {"name": "Icelandic", "code": "is"},
-    {"name": "Maltese", "code": "mt"},
-    {"name": "Welsh", "code": "cy"},
-    {"name": "Irish", "code": "ga"},
-    {"name": "Scottish Gaelic", "code": "gd"},
-    {"name": "Manx", "code": "gv"},
-    {"name": "Cornish", "code": "kw"},
-    {"name": "Breton", "code": "br"},
-    {"name": "Basque", "code": "eu"},
-    {"name": "Catalan", "code": "ca"},
-    {"name": "Galician", "code": "gl"},
-    {"name": "Afrikaans", "code": "af"},
-    {"name": "Swahili", "code": "sw"},
-    {"name": "Zulu", "code": "zu"},
-    {"name": "Xhosa", "code": "xh"},
-    {"name": "Yoruba", "code": "yo"},
-    {"name": "Igbo", "code": "ig"},
-    {"name": "Hausa", "code": "ha"},
-    {"name": "Somali", "code": "so"},
-    {"name": "Amharic", "code": "am"},
-    {"name": "Oromo", "code": "om"},
-    {"name": "Tigrinya", "code": "ti"},
-    {"name": "Kinyarwanda", "code": "rw"},
-    {"name": "Kirundi", "code": "rn"},
-    {"name": "Malagasy", "code": "mg"},
-    {"name": "Sesotho", "code": "st"},
-    {"name": "Setswana", "code": "tn"},
-    {"name": "Siswati", "code": "ss"},
-    {"name": "Tsonga", "code": "ts"},
-    {"name": "Venda", "code": "ve"},
-    {"name": "Ndebele", "code": "nd"},
-    {"name": "Shona", "code": "sn"},
-    {"name": "Chichewa", "code": "ny"},
-    {"name": "Tswana", "code": "tn"},
-    {"name": "Sotho", "code": "st"},
-    {"name": "Tamil", "code": "ta"},
-    {"name": "Telugu", "code": "te"},
-    {"name": "Kannada", "code": "kn"},
-    {"name": "Malayalam", "code": "ml"},
-    {"name": "Gujarati", "code": "gu"},
-    {"name": "Marathi", "code": "mr"},
-    {"name": "Punjabi", "code": "pa"},
-    {"name": "Urdu", "code": "ur"},
-    {"name": "Nepali", "code": "ne"},
-    {"name": "Sinhala", "code": "si"},
-    {"name": "Burmese", "code": "my"},
-    {"name": "Khmer", "code": "km"},
-    {"name": "Lao", "code": "lo"},
-    {"name": "Mongolian", "code": "mn"},
-    {"name": "Tibetan", "code": "bo"},
-    {"name": "Uyghur", "code": "ug"},
-    {"name": "Kazakh", "code": "kk"},
-    {"name": "Kyrgyz", "code": "ky"},
-    {"name": "Uzbek", "code": "uz"},
-    {"name": "Turkmen", "code": "tk"},
-    {"name": "Tajik", "code": "tg"},
-    {"name": "Pashto", "code": "ps"},
-    {"name": "Dari", "code": "prs"},
-    {"name": "Kurdish", "code": "ku"},
-    {"name": "Persian", "code": "fa"},
-    {"name": "Sindhi", "code": "sd"},
-    {"name": "Balochi", "code": "bal"},
-    {"name": "Kashmiri", "code": "ks"},
-    {"name": "Dogri", "code": "doi"},
-    {"name": "Konkani", "code": "kok"},
-    {"name": "Manipuri", "code": "mni"},
-    {"name": "Bodo", "code": "brx"},
-    {"name": "Sanskrit", "code": "sa"},
-    {"name": "Maithili", "code": "mai"},
-    {"name": "Santali", "code": "sat"},
-    {"name": "Nepali", "code": "ne"},
-    {"name": "Sikkimese", "code": "sip"},
-    {"name": "Ladakhi", "code": "lbj"},
-    {"name": "Tulu", "code": "tcy"},
-    {"name": "Kodava", "code": "kfa"},
-    {"name": "Toda", "code": "tcx"},
-    {"name": "Badaga", "code": "bfq"},
-    {"name": "Kurumba", "code": "kfi"},
-    {"name": "Irula", "code": "iru"},
-    {"name": "Paniya", "code": "pcg"},
-    {"name": "Mullu Kurumba", "code": "kfi"},
-    {"name": "Betta Kurumba", "code": "kfi"},
-    {"name": "Mala Malasar", "code": "ymr"},
-    {"name": "Mala Arayan", "code": "ymr"},
-    {"name": "Mannan", "code": "mjv"},
-    {"name": "Muthuvan", "code": "muv"},
-    {"name": "Hill Pandaram", "code": "pci"},
-    {"name": "Malapandaram", "code": "mjp"},
-    {"name": "Urali", "code": "url"},
-    {"name": "Mannan", "code": "mjv"},
-    {"name": "Muthuvan", "code": "muv"},
-    {"name": "Hill Pandaram", "code": "pci"},
-    {"name": "Malapandaram", "code": "mjp"},
-    {"name": "Urali", "code": "url"},
-    {"name": "Mannan", "code": "mjv"},
-    {"name": "Muthuvan", "code": "muv"},
-    {"name": "Hill Pandaram", "code": "pci"},
-    {"name": "Malapandaram", "code": "mjp"},
-    {"name": "Urali", "code": "url"}
-]
-
-def extract_video_id(url: str) -> Optional[str]:
-    """Extract video ID from YouTube URL"""
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([a-zA-Z0-9_-]+)',
-        r'(?:youtube\.com\/embed\/)([a-zA-Z0-9_-]+)',
-        r'(?:youtube\.com\/v\/)([a-zA-Z0-9_-]+)',
-        r'(?:youtube\.com\/e\/)([a-zA-Z0-9_-]+)',
-        r'(?:youtube\.com\/user\/[^\/]+\/)([a-zA-Z0-9_-]+)',
-        r'(?:youtube\.com\/[^\/]+\/live\/)([a-zA-Z0-9_-]+)',
-        r'(?:youtube\.com\/[^\/]+\/)([a-zA-Z0-9_-]+)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
-
-def check_video_availability(video_id: str) -> bool:
-    """Check if video exists and is accessible"""
-    try:
-        response = requests.get(f"https://www.youtube.com/watch?v={video_id}")
-        return response.status_code == 200
-    except:
-        return False
-
-def get_video_info(url: str) -> Optional[Dict[str, Any]]:
-    """
-    Get video information using YouTube Transcript API
+if 'summary_usage' not in st.session_state:
+    st.session_state.summary_usage = None
+if 'translation_usage' not in st.session_state:
+    st.session_state.translation_usage = None
+if 'summary_trace' not in st.session_state:
+    st.session_state.summary_trace = None
+if 'translation_trace' not in st.session_state:
+    st.session_state.translation_trace = None
+if 'pipeline_state' not in st.session_state:
+    st.session_state.pipeline_state = None
+if 'summary_job' not in st.session_state:
+    st.session_state.summary_job = None
+if 'translation_job' not in st.session_state:
+    st.session_state.translation_job = None
+
+# Seconds between progress refreshes while a background job runs
+JOB_POLL_INTERVAL = 0.25
+# Show the per-stage timing breakdown under each result
+DEBUG_PANEL = os.getenv("DEBUG_PANEL", "").lower() in ("1", "true", "yes")
+
+def get_api_key() -> Optional[str]:
+    """Return the user provided key, or None so the backend uses its own environment key"""
+    return st.session_state.user_api_key or None
+
+def start_job(key: str, job: Job):
+    """Remember a submitted job in the session and the page URL"""
+    st.session_state[key] = job.id
+    st.query_params[key] = job.id
+
+def forget_job(key: str):
+    st.session_state[key] = None
+    if key in st.query_params:
+        del st.query_params[key]
+
+def follow_job(job: Job):
+    """Render a running job's progress and streamed text until it finishes"""
+    progress_bar = st.progress(0.0, text="🔄 Waiting for a free worker...")
+    stream = st.empty()
+    while not job.finished:
+        if job.total:
+            progress_bar.progress(job.done / job.total, text=f"🔄 {job.stage} {job.done}/{job.total} done")
+        elif job.status == "running":
+            progress_bar.progress(0.0, text="🔄 Working...")
+        if job.partial:
+            stream.markdown(job.partial + "▌")
+        time.sleep(JOB_POLL_INTERVAL)
+    progress_bar.empty()
+    stream.empty()
+
+def collect_job(key: str, spinner_text: str) -> Optional[Job]:
+    """Return the job stored under key once it has finished, following it until then
+
+    The job ID is kept in the session and the URL, so reruns and reconnects
+    pick up the same job. Returns None when there is no new result to apply.
     """
-    try:
-        video_id = extract_video_id(url)
-        if not video_id:
-            st.error("Invalid YouTube URL")
-            return None
-
-        # Get video thumbnail
-        thumbnail_url = f"http://img.youtube.com/vi/{video_id}/0.jpg"
-        
-        # Get transcript to extract some basic info
-        try:
-            transcript = YouTubeTranscriptApi.get_transcript(video_id)
-            if transcript:
-                return {
-                    'title': f"Video ID: {video_id}",
-                    'thumbnail': thumbnail_url,
-                    'has_transcript': True
-                }
-        except:
-            return {
-                'title': f"Video ID: {video_id}",
-                'thumbnail': thumbnail_url,
-                'has_transcript': False
-            }
-
-    except Exception as e:
-        st.error(f"Error getting video info: {str(e)}")
-        return None
-
-def get_available_languages(video_id):
-    """Get available caption languages using multiple methods"""
-    try:
-        # Method 1: Try YouTube Transcript API first (no API key needed)
-        try:
-            languages = YouTubeTranscriptApi.list_transcripts(video_id)
-            available_languages = []
-            for transcript in languages:
-                available_languages.append({
-                    'code': transcript.language_code,
-                    'name': transcript.language,
-                    'is_generated': transcript.is_generated
-                })
-            if available_languages:
-                return available_languages
-        except Exception as e:
-            print(f"YouTube Transcript API error: {str(e)}")
-            pass
-
-        # Method 2: Try pytube (no API key needed)
-        try:
-            yt = YouTube(f"https://www.youtube.com/watch?v={video_id}")
-            captions = yt.captions
-            if captions:
-                available_languages = []
-                for lang_code in captions:
-                    caption = captions[lang_code]
-                    available_languages.append({
-                        'code': lang_code,
-                        'name': caption.name,
-                        'is_generated': caption.code.startswith('a.')
-                    })
-                if available_languages:
-                    return available_languages
-        except Exception as e:
-            print(f"Pytube error: {str(e)}")
-            pass
-
-        # Method 3: Try YouTube Data API as last resort
-        try:
-            api_key = os.getenv('YOUTUBE_API_KEY')
-            if api_key:
-                youtube = build('youtube', 'v3', developerKey=api_key)
-                request = youtube.captions().list(
-                    part="snippet",
-                    videoId=video_id
-                )
-                response = request.execute()
-                
-                if 'items' in response and response['items']:
-                    available_languages = []
-                    for item in response['items']:
-                        if 'snippet' in item and 'language' in item['snippet']:
-                            available_languages.append({
-                                'code': item['snippet']['language'],
-                                'name': item['snippet'].get('name', item['snippet']['language']),
-                                'is_generated': item['snippet'].get('trackKind', '') == 'ASR'
-                            })
-                    if available_languages:
-                        return available_languages
-        except HttpError as e:
-            if e.resp.status == 403:
-                print("YouTube Data API is not enabled. Skipping this method.")
-            elif e.resp.status == 404:
-                print("Video not found or captions not available")
-            else:
-                print(f"YouTube Data API error: {str(e)}")
-            pass
-        except Exception as e:
-            print(f"YouTube Data API error: {str(e)}")
-            pass
-
-        st.error("No captions available for this video")
-        return None
-
-    except Exception as e:
-        print(f"General error: {str(e)}")
-        st.error("Error checking available languages")
+    job_id = st.session_state[key] or st.query_params.get(key)
+    if not job_id or st.session_state.get(f"{key}_applied") == job_id:
         return None
-
-def get_video_duration(url):
-    """Get video duration using pytube"""
-    try:
-        yt = YouTube(url)
-        duration_seconds = yt.length
-        return duration_seconds
-    except Exception as e:
-        # Silently continue if duration check fails
-        return None
-
-def get_api_key():
-    """Get API key with priority to user provided key"""
-    if st.session_state.user_api_key:
-        return st.session_state.user_api_key
-    return os.getenv("GROQ_API_KEY")
-
-def summarize_video(url, language_code='en'):
-    """Summarize YouTube video content using Groq"""
-    # Get GROQ_API_KEY with priority to user provided key
-    GROQ_API_KEY = get_api_key()
-    if not GROQ_API_KEY:
-        st.error("GROQ_API_KEY not found. Please provide your API key in the settings above.")
-        return None
-
-    # Extract video ID
-    video_id = extract_video_id(url)
-    if not video_id:
-        st.error("Invalid YouTube URL")
-        return None
-
-    # Get available languages
-    available_languages = get_available_languages(video_id)
-    if not available_languages:
-        st.error("Could not retrieve available languages for this video")
-        return None
-
-    # If requested language is not available, use the first available language
-    if not any(lang['code'] == language_code for lang in available_languages):
-        language_code = available_languages[0]['code']
-        st.info(f"Requested language not available. Using {available_languages[0]['name']} instead.")
-
-    # Get video transcript
-    transcript = get_video_transcript(url)
-    if not transcript:
+    job = get_job_queue().get(job_id)
+    if job is None:
+        forget_job(key)
         return None
-
-    # Initialize text splitter
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=2000,
-        chunk_overlap=200,
-        length_function=len
-    )
-
-    # Split transcript into chunks
-    docs = text_splitter.create_documents([transcript])
-
-    # Initialize Groq with llama-3.1-8b-instant model
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama-3.1-8b-instant",
-        temperature=0.3,
-        max_tokens=2048
-    )
-
-    # Create prompt template
-    prompt = PromptTemplate(
-        input_variables=["text"],
-        template="""Please provide a comprehensive summary of the following text. 
-        Focus on the main points and key details while maintaining the original context and meaning:
-
-        {text}
-
-        SUMMARY:"""
+    st.session_state[key] = job_id
+    if not job.finished:
+        with st.spinner(spinner_text):
+            follow_job(job)
+    st.session_state[f"{key}_applied"] = job_id
+    return job
+
+def format_duration(seconds: int) -> str:
+    """Format a duration as h:mm:ss, or m:ss when under an hour"""
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def show_result(text: str):
+    """Show a summary or translation in a shaded box"""
+    # The blank lines end the HTML block, so Markdown in the text, such as chapter links, is rendered
+    st.markdown(
+        f"<div style='background-color: #f8f9fa; padding: 1.5em; border-radius: 5px; margin: 1em 0;'>\n\n{text}\n\n</div>",
+        unsafe_allow_html=True
     )
 
-    # Initialize chain
-    chain = LLMChain(llm=llm, prompt=prompt)
-
-    # Generate summary
-    try:
-        # Process each chunk and combine summaries
-        summaries = []
-        for doc in docs:
-            result = chain.invoke({"text": doc.page_content})
-            summaries.append(result['text'])
-
-        # Combine all summaries
-        combined_text = "\n\n".join(summaries)
-        
-        # Create final summary
-        final_prompt = PromptTemplate(
-            input_variables=["text"],
-            template="""Please provide a final, concise summary combining all these points:
-
-            {text}
-
-            FINAL SUMMARY:"""
+def show_usage(usage: Optional["TokenUsage"]):
+    """Show whether a result came from the cache or how many tokens it took"""
+    if not usage:
+        return
+    if usage.calls:
+        from_cache = f" · {usage.cache_hits} served from cache" if usage.cache_hits else ""
+        st.caption(
+            f"📊 {usage.calls} LLM calls · {usage.input_tokens:,} tokens sent · "
+            f"{usage.output_tokens:,} tokens generated{from_cache}"
+        )
+    elif usage.cached:
+        st.caption("⚡ Served from cache · 0 LLM tokens")
+    if usage.routes:
+        st.caption("🧭 " + " · ".join(
+            f"{route}: {stats['calls']} calls, {stats['seconds']:.1f}s, ${stats['cost_usd']:.4f}"
+            for route, stats in usage.routes.items()
+        ))
+    if usage.extractive_tokens_removed > 0:
+        st.caption(f"✂️ Local extractive compression removed {usage.extractive_tokens_removed:,} tokens")
+    if usage.transcript_tokens_removed > 0:
+        raw_tokens = usage.transcript_tokens + usage.transcript_tokens_removed
+        st.caption(
+            f"🧹 Transcript cleanup removed {usage.transcript_tokens_removed:,} of {raw_tokens:,} tokens "
+            f"({usage.transcript_tokens_removed / raw_tokens:.0%})"
         )
-        
-        final_chain = LLMChain(llm=llm, prompt=final_prompt)
-        final_result = final_chain.invoke({"text": combined_text})
-        
-        return final_result['text']
-    except Exception as e:
-        st.error(f"Error generating summary: {str(e)}")
-        return None
-
-def translate_summary(summary, target_language='en'):
-    """Translate summary to target language using Groq"""
-    # Get GROQ_API_KEY with priority to user provided key
-    GROQ_API_KEY = get_api_key()
-    if not GROQ_API_KEY:
-        st.error("GROQ_API_KEY not found. Please provide your API key in the settings above.")
-        return None
-
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama-3.1-8b-instant",
-        temperature=0.3,
-        max_tokens=2048
-    )
-
-    translate_prompt = PromptTemplate(
-        input_variables=["text", "target_language"],
-        template="""Please translate the following text to {target_language}. 
-        Maintain the same format and structure while ensuring accurate translation:
-
-        {text}
-
-        TRANSLATION:"""
-    )
-
-    chain = LLMChain(llm=llm, prompt=translate_prompt)
-    
-    try:
-        result = chain.invoke({
-            "text": summary,
-            "target_language": target_language
-        })
-        return result['text']
-    except Exception as e:
-        st.error(f"Error translating summary: {str(e)}")
-        return None
-
-def summarize_content(content: str) -> str:
-    """
-    Summarize the content using Groq
-    """
-    try:
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a helpful assistant that summarizes content concisely."),
-            ("user", "Please summarize the following content in bullet points:\n\n{content}")
-        ])
-        
-        chain = prompt | llm | StrOutputParser()
-        return chain.invoke({"content": content})
-    except Exception as e:
-        st.error(f"Error summarizing content: {str(e)}")
-        return ""
-
-def get_video_transcript(url: str) -> Optional[str]:
-    """Get video transcript using multiple methods"""
-    try:
-        video_id = extract_video_id(url)
-        if not video_id:
-            st.error("Invalid YouTube URL")
-            return None
-
-        # Check if video exists
-        if not check_video_availability(video_id):
-            st.error("Video not found or not accessible")
-            return None
-
-        # Get available languages
-        languages = get_available_languages(video_id)
-        if not languages:
-            st.error("No captions available for this video")
-            return None
-
-        # Try YouTube Transcript API first
-        try:
-            # Try each available language
-            for lang in languages:
-                try:
-                    transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[lang['code']])
-                    # Format transcript
-                    formatter = TextFormatter()
-                    transcript_text = formatter.format_transcript(transcript)
-                    return transcript_text
-                except:
-                    continue
-        except:
-            pass
-
-        # Try pytube as fallback
-        try:
-            yt = YouTube(f"https://www.youtube.com/watch?v={video_id}")
-            captions = yt.captions
-            if captions:
-                for lang_code in captions:
-                    try:
-                        caption = captions[lang_code]
-                        transcript = caption.generate_srt_captions()
-                        return transcript
-                    except:
-                        continue
-        except:
-            pass
-
-        st.error("Could not retrieve transcript for this video")
-        return None
-
-    except Exception as e:
-        st.error("Error getting transcript")
-        return None
-
-def generate_summary(transcript: str) -> str:
-    """Generate summary using Google's Gemini Pro model"""
-    try:
-        prompt = """You are a YouTube video summarizer. Please analyze the following transcript and create a comprehensive summary that includes:
-
-1. Main topic and key points
-2. Important details and examples
-3. Key takeaways or conclusions
-
-Format the summary in clear, bullet points. Keep it concise but informative, focusing on the most important information.
-
-Transcript:
-"""
-
-        model = genai.GenerativeModel("gemini-pro")
-        response = model.generate_content(prompt + transcript)
-        
-        # Format the response nicely
-        summary = response.text
-        summary = summary.replace("•", "• ")  # Add space after bullet points
-        summary = summary.replace("\n\n", "\n")  # Remove extra newlines
-        
-        return summary
 
-    except Exception as e:
-        st.error(f"Error generating summary: {str(e)}")
-        return ""
+def show_trace(trace: Optional["RunTrace"]):
+    """Show where the time of the last run went when the debug panel is enabled"""
+    if not DEBUG_PANEL or trace is None:
+        return
+    with st.expander("🐞 Timing breakdown"):
+        rows = [
+            f"| `{row['span']}` | {row['count']} | {row['first_at_s']:.2f}s | {row['total_s']:.2f}s | {row['max_s']:.2f}s |"
+            for row in trace.breakdown()
+        ]
+        st.markdown("\n".join(["| Span | Calls | Started at | Total | Slowest |", "|---|---|---|---|---|"] + rows))
+        if trace.counters:
+            rows = [f"| `{name}` | {value:g} |" for name, value in sorted(trace.counters.items())]
+            st.markdown("\n".join(["| Counter | Value |", "|---|---|"] + rows))
 
 def main():
     st.set_page_config(
@@ -632,7 +211,7 @@ def main():
             "Groq API Key (Optional)", 
             value=st.session_state.user_api_key,
             type="password",
-            help="Your API key will be used instead of the default key if provided"
+            help="Your API key will be used instead of the default key if provided. Separate several keys with commas to spread the load over them"
         )
         if user_api_key != st.session_state.user_api_key:
             st.session_state.user_api_key = user_api_key
@@ -658,18 +237,29 @@ def main():
             if st.button("Fetch Transcripts", key="url_enter_button", help="Click to fetch available transcripts"):
                 st.session_state.url_input = url_input
                 st.session_state.url = url_input
+                fetched_video_id = extract_video_id(url_input)
+                if fetched_video_id:
+                    invalidate_video_probe(fetched_video_id)
+                forget_job("summary_job")
+                forget_job("translation_job")
                 st.session_state.summary = None
-                st.session_state.translated_summary = None
+                st.session_state.translations = None
                 st.session_state.language_code = None
 
-        # Warning about video length with custom styling
+        # Note about video length with custom styling
         st.markdown("""
             <div style='background-color: #fff3cd; padding: 1em; border-radius: 5px; margin: 1em 0;'>
-                ⚠️ <span style='color: #856404;'>This system is optimized for videos under 10 minutes. 
-                Longer videos may result in incomplete summaries or processing delays.</span>
+                ⚠️ <span style='color: #856404;'>Long videos are summarized in several passes. 
+                Lectures and podcasts of an hour or more may take a few minutes.</span>
             </div>
         """, unsafe_allow_html=True)
         
+        # After a reconnect, restore the video of a summary job still named in the URL
+        if not st.session_state.url_input and st.query_params.get("summary_job"):
+            restored_job = get_job_queue().get(st.query_params["summary_job"])
+            if restored_job:
+                st.session_state.url_input = restored_job.params["url"]
+
         url = st.session_state.url_input if st.session_state.url_input else None
         
         if url:
@@ -679,19 +269,22 @@ def main():
                 st.error("❌ Invalid YouTube URL")
                 return
 
-            # Check video duration
-            duration = get_video_duration(url)
-            if duration and duration > 600:
-                st.error("❌ This video is longer than 10 minutes. For best results, please use a shorter video.")
-                return
-
-            # Get available languages with loading animation
+            # Probe the video and its caption tracks with loading animation
             with st.spinner("🔍 Fetching available languages..."):
-                available_languages = get_available_languages(video_id)
+                probe = probe_video(video_id)
+                if not probe.exists:
+                    st.error("❌ Video not found or not accessible")
+                    return
+                available_languages = probe.caption_tracks
                 if not available_languages:
                     st.error("❌ Could not retrieve available languages for this video")
                     return
 
+            video_details = probe.title
+            if probe.duration:
+                video_details += f" · {format_duration(probe.duration)}"
+            st.caption(f"🎬 {video_details}")
+
             # Language selection with improved UI
             st.markdown("### Select Source Language")
             language_options = [f"{lang['name']} ({lang['code']}){' [Auto-generated]' if lang['is_generated'] else ''}" 
@@ -702,45 +295,185 @@ def main():
             )
             language_code = available_languages[language_options.index(selected_language)]['code']
 
+            # Optional local pre-compression of long transcripts
+            with st.expander("⚡ Fast mode"):
+                use_extractive = st.checkbox(
+                    "Pre-compress the transcript locally before summarizing",
+                    help="Keeps only the most informative sentences, so fewer LLM calls are needed"
+                )
+                extractive_ratio = st.slider(
+                    "Share of the transcript to keep",
+                    min_value=0.1,
+                    max_value=0.9,
+                    value=0.5,
+                    step=0.1,
+                    disabled=not use_extractive
+                )
+                extractive_method = st.radio(
+                    "Sentence scoring",
+                    options=["textrank", "tfidf"],
+                    horizontal=True,
+                    disabled=not use_extractive
+                )
+
+            chapter_mode = st.toggle(
+                "🕒 Timestamped chapters",
+                help="Summarize the video chapter by chapter, showing each chapter as soon as it is ready"
+            )
+
             # Generate summary section
             if st.button("Generate Summary", help="Click to generate video summary"):
-                with st.spinner("🔄 Generating summary..."):
-                    st.session_state.summary = summarize_video(url, language_code)
-                    st.session_state.language_code = language_code
-                    st.session_state.translated_summary = None
+                api_key = get_api_key()
+                summary_options = {
+                    "extractive_ratio": extractive_ratio if use_extractive else None,
+                    "extractive_method": extractive_method
+                }
+                # Chunk summaries of an earlier failed or interrupted attempt are reused
+                pipeline_state = st.session_state.pipeline_state
+
+                def run_summary(job: Job) -> str:
+                    # LangChain is only loaded once a summary is requested, keeping the first page load fast
+                    from chapters import format_chapters
+                    from summarizer import PipelineState, TokenUsage, summarize_chapters, summarize_video
+
+                    job.usage = TokenUsage()
+                    job.state = pipeline_state or PipelineState()
+                    if chapter_mode:
+                        ready = []
+
+                        def show_chapter(chapter):
+                            ready.append(chapter)
+                            job.partial = format_chapters(ready, video_id)
+
+                        chapters = summarize_chapters(
+                            url,
+                            language_code,
+                            on_chapter=show_chapter,
+                            on_progress=job.set_progress,
+                            usage=job.usage,
+                            api_key=api_key,
+                            on_notice=job.notices.append,
+                            state=job.state
+                        )
+                        return format_chapters(chapters, video_id)
+                    return summarize_video(
+                        url,
+                        language_code,
+                        on_progress=job.set_progress,
+                        on_token=job.append_text,
+                        usage=job.usage,
+                        api_key=api_key,
+                        on_notice=job.notices.append,
+                        state=job.state,
+                        **summary_options
+                    )
+
+                try:
+                    job = get_job_queue().submit(
+                        "summary",
+                        run_summary,
+                        params={"url": url, "language_code": language_code, "chapters": chapter_mode}
+                    )
+                    start_job("summary_job", job)
+                    forget_job("translation_job")
+                    st.session_state.summary = None
+                    st.session_state.translations = None
+                except QueueFull:
+                    st.error("⏳ The server is busy right now. Please try again in a moment.")
+
+            summary_job = collect_job("summary_job", "🔄 Generating summary...")
+            if summary_job:
+                for notice in summary_job.notices:
+                    st.info(notice)
+                if summary_job.state is not None:
+                    st.session_state.pipeline_state = summary_job.state
+                if summary_job.status == "done":
+                    st.session_state.summary = summary_job.result
+                    st.session_state.summary_usage = summary_job.usage
+                    st.session_state.summary_trace = summary_job.trace
+                    st.session_state.language_code = summary_job.params["language_code"]
+                else:
+                    st.error(summary_job.error)
+                    if summary_job.state is not None and summary_job.state.results:
+                        st.info(
+                            f"💾 {len(summary_job.state.results)} partial summaries were saved. "
+                            "Generating the summary again only redoes the missing work."
+                        )
 
             # Display summary and translation options
             if st.session_state.summary:
                 st.markdown("### 📝 Video Summary")
-                st.markdown(f"""
-                    <div style='background-color: #f8f9fa; padding: 1.5em; border-radius: 5px; margin: 1em 0;'>
-                        {st.session_state.summary}
-                    </div>
-                """, unsafe_allow_html=True)
+                show_result(st.session_state.summary)
+                show_usage(st.session_state.summary_usage)
+                show_trace(st.session_state.summary_trace)
                 
                 # Translation section with improved UI
                 st.markdown("### 🌐 Translation Options")
-                target_language = st.selectbox(
-                    "Select Target Language (Default Best option is English)",
+                target_languages = st.multiselect(
+                    "Select Target Languages (Default Best option is English)",
                     options=[lang["name"] for lang in SUPPORTED_LANGUAGES],
-                    index=0
+                    default=[SUPPORTED_LANGUAGES[0]["name"]]
                 )
                 
-                if st.button("Translate", help="Click to translate the summary"):
-                    with st.spinner(f"🔄 Translating to {target_language}..."):
-                        st.session_state.translated_summary = translate_summary(
-                            st.session_state.summary, 
-                            target_language
+                if st.button("Translate", help="Click to translate the summary", disabled=not target_languages):
+                    api_key = get_api_key()
+                    summary = st.session_state.summary
+
+                    def run_translation(job: Job) -> Dict[str, str]:
+                        from summarizer import TokenUsage, translate_summary, translate_summary_many
+
+                        job.usage = TokenUsage()
+                        if len(target_languages) == 1:
+                            # A single language streams as it is generated
+                            translation = translate_summary(
+                                summary,
+                                target_languages[0],
+                                on_token=job.append_text,
+                                usage=job.usage,
+                                api_key=api_key
+                            )
+                            return {target_languages[0]: translation}
+                        return translate_summary_many(
+                            summary,
+                            target_languages,
+                            on_progress=job.set_progress,
+                            usage=job.usage,
+                            api_key=api_key,
+                            on_notice=job.notices.append
                         )
 
-            # Display translation with styling
-            if st.session_state.translated_summary:
-                st.markdown(f"### 🌍 {target_language} Translation")
-                st.markdown(f"""
-                    <div style='background-color: #f8f9fa; padding: 1.5em; border-radius: 5px; margin: 1em 0;'>
-                        {st.session_state.translated_summary}
-                    </div>
-                """, unsafe_allow_html=True)
+                    try:
+                        job = get_job_queue().submit(
+                            "translation",
+                            run_translation,
+                            params={"target_languages": target_languages}
+                        )
+                        start_job("translation_job", job)
+                        st.session_state.translations = None
+                    except QueueFull:
+                        st.error("⏳ The server is busy right now. Please try again in a moment.")
+
+                translation_job = collect_job("translation_job", f"🔄 Translating to {', '.join(target_languages)}...")
+                if translation_job:
+                    for notice in translation_job.notices:
+                        st.warning(notice)
+                    if translation_job.status == "done":
+                        st.session_state.translations = translation_job.result
+                        st.session_state.translation_usage = translation_job.usage
+                        st.session_state.translation_trace = translation_job.trace
+                    else:
+                        st.error(translation_job.error)
+
+            # Display translations with styling, one tab per language
+            if st.session_state.translations:
+                languages = list(st.session_state.translations)
+                st.markdown("### 🌍 " + (f"{languages[0]} Translation" if len(languages) == 1 else "Translations"))
+                tabs = st.tabs(languages) if len(languages) > 1 else [st.container()]
+                for tab, language in zip(tabs, languages):
+                    with tab:
+                        show_result(st.session_state.translations[language])
+                show_usage(st.session_state.translation_usage)
+                show_trace(st.session_state.translation_trace)
 
 if __name__ == "__main__":
     main()
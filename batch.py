@@ -0,0 +1,184 @@
+"""Summarize many YouTube videos without the Streamlit UI.
+
+    python batch.py videos.txt -o summaries.jsonl --workers 4 --translate Spanish
+
+Each input line is a YouTube URL or a bare video ID; blank lines and lines
+starting with # are ignored. One JSON object per video is appended to the
+output file as soon as it finishes. Videos already summarized successfully
+in the output file are skipped, so a crashed run resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Callable, Set
+
+from errors import SummarizerError
+from extractive import EXTRACTIVE_METHODS
+from summarizer import summarize_video, translate_summary
+from youtube import extract_video_id
+
+VIDEO_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+
+def to_video_url(item: str) -> Optional[str]:
+    """Turn a YouTube URL or bare video ID into a watch URL"""
+    item = item.strip()
+    if VIDEO_ID_PATTERN.match(item):
+        return f"https://www.youtube.com/watch?v={item}"
+    video_id = extract_video_id(item)
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}"
+    return None
+
+def read_inputs(path: str) -> List[str]:
+    """Read URLs or video IDs from a file, one per line"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """Return the video IDs already summarized successfully in output_path"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            if record.get("status") == "ok":
+                done.add(record["video_id"])
+    return done
+
+class JsonlWriter:
+    """Append JSON records to a file from several threads, flushing each one to disk"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+def summarize_one(url: str, language_code: str = 'en', target_language: Optional[str] = None,
+                  api_key: Optional[str] = None, extractive_ratio: Optional[float] = None,
+                  extractive_method: str = "textrank") -> Dict[str, Any]:
+    """Summarize a single video and return a JSON serializable result record"""
+    record = {"video_id": extract_video_id(url), "url": url, "notices": []}
+    started = time.perf_counter()
+    try:
+        record["summary"] = summarize_video(
+            url,
+            language_code,
+            api_key=api_key,
+            on_notice=record["notices"].append,
+            extractive_ratio=extractive_ratio,
+            extractive_method=extractive_method
+        )
+        if target_language:
+            record["translation"] = translate_summary(record["summary"], target_language, api_key=api_key)
+            record["target_language"] = target_language
+        record["status"] = "ok"
+    except SummarizerError as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+def run_batch(items: List[str], output_path: str, workers: int = 4, language_code: str = 'en',
+              target_language: Optional[str] = None, api_key: Optional[str] = None,
+              extractive_ratio: Optional[float] = None, extractive_method: str = "textrank",
+              on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, int]:
+    """Summarize items with a pool of workers, appending results to output_path.
+
+    Returns counts of succeeded, failed, skipped and invalid items.
+    """
+    counts = {"ok": 0, "error": 0, "skipped": 0, "invalid": 0}
+    done = load_checkpoint(output_path)
+
+    urls = []
+    seen = set()
+    for item in items:
+        url = to_video_url(item)
+        if url is None:
+            counts["invalid"] += 1
+            print(f"Skipping invalid input: {item}", file=sys.stderr)
+            continue
+        video_id = extract_video_id(url)
+        if video_id in done or video_id in seen:
+            counts["skipped"] += 1
+            continue
+        seen.add(video_id)
+        urls.append(url)
+
+    writer = JsonlWriter(output_path)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(
+                    summarize_one, url, language_code, target_language, api_key, extractive_ratio, extractive_method
+                )
+                for url in urls
+            ]
+            for future in as_completed(futures):
+                record = future.result()
+                writer.write(record)
+                counts[record["status"]] += 1
+                if on_result:
+                    on_result(record)
+    finally:
+        writer.close()
+    return counts
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize YouTube videos in bulk")
+    parser.add_argument("input", help="file with one YouTube URL or video ID per line")
+    parser.add_argument("-o", "--output", default="summaries.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="number of videos processed at once")
+    parser.add_argument("-l", "--language", default="en", help="preferred caption language code")
+    parser.add_argument("-t", "--translate", default=None, help="also translate each summary to this language")
+    parser.add_argument("--api-key", default=None, help="Groq API key (defaults to GROQ_API_KEY)")
+    parser.add_argument("--compress", type=float, default=None, metavar="RATIO",
+                        help="keep only this share of each transcript (0-1) using local extractive compression")
+    parser.add_argument("--compress-method", choices=EXTRACTIVE_METHODS, default="textrank",
+                        help="sentence scoring used by --compress")
+    args = parser.parse_args(argv)
+
+    items = read_inputs(args.input)
+
+    def report(record):
+        status = "ok" if record["status"] == "ok" else f"error: {record['error']}"
+        print(f"{record['video_id']}: {status} ({record['elapsed_seconds']}s)", file=sys.stderr)
+
+    counts = run_batch(
+        items,
+        args.output,
+        workers=args.workers,
+        language_code=args.language,
+        target_language=args.translate,
+        api_key=args.api_key,
+        extractive_ratio=args.compress,
+        extractive_method=args.compress_method,
+        on_result=report
+    )
+    print(
+        f"Done: {counts['ok']} summarized, {counts['error']} failed, "
+        f"{counts['skipped']} already done, {counts['invalid']} invalid",
+        file=sys.stderr
+    )
+    return 1 if counts["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""Replay transcripts through the summarization pipeline fully offline.
+
+    python benchmarks/pipeline_benchmark.py --concurrency 1 4 8 -o results.json
+
+Each case is a synthetic transcript (manual or auto-generated captions,
+2 minutes to 3 hours by default) or a recorded one from --transcripts, and
+runs get_video_transcript -> normalize -> split -> map -> reduce -> final
+-> translate_summary once per map concurrency level. YouTube is replaced by
+stand-ins for oEmbed, the watch page and the transcript API, and the LLM by
+the local fake backend, so results depend only on the code under test and
+the simulated latencies given on the command line.
+
+Per run the benchmark reports wall time per stage, LLM calls, tokens in and
+out, calls, latency, tokens and estimated cost per LLM route, peak traced
+memory, throughput and the run's metrics spans (including per-chunk LLM
+latency) and counters, as JSON. Run it once per LLM_ROUTES policy to
+compare routes; the fake backends honour each route's output cap. With --history the record
+is also appended to a JSONL file so regressions show up over time.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from functools import lru_cache
+from typing import Optional, Any, Callable, Dict, List
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import summarizer  # noqa: E402
+import youtube  # noqa: E402
+from caches import ResultCache, TranscriptCache  # noqa: E402
+from llm_backends import FakeBackend  # noqa: E402
+from metrics import trace_run  # noqa: E402
+from routing import LLM_ROUTES  # noqa: E402
+from startup_benchmark import git_revision  # noqa: E402
+
+DEFAULT_MINUTES = [2, 10, 30, 60, 180]
+CAPTION_KINDS = ("manual", "auto")
+# Typical speaking rate, used to size synthetic transcripts and recorded ones without timings
+WORDS_PER_MINUTE = 150
+
+VOCABULARY = """
+model data system network training result value function layer memory process signal market price
+energy water city history science music language computer design problem question answer example
+people company research method theory experiment chapter story video channel project feature
+performance latency cache request server client database query index thread queue budget
+important simple different large small early recent common special possible difficult general
+build measure explain compare improve reduce increase describe discuss consider show create
+""".split()
+FILLERS = ["um", "uh", "you know", "so"]
+
+def synthetic_segments(minutes: float, kind: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate timed caption segments resembling the transcript API output
+
+    Manual captions are punctuated sentences; auto-generated ones are
+    lowercase, unpunctuated, roll over part of the previous line and carry
+    filler words and [Music] markers, like real YouTube auto captions.
+    """
+    rng = random.Random(f"{kind}-{minutes}-{seed}")
+    total_words = int(minutes * WORDS_PER_MINUTE)
+    seconds_per_word = 60.0 / WORDS_PER_MINUTE
+    segments = []
+    written, start, previous = 0, 0.0, []
+    while written < total_words:
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 14))]
+        if kind == "manual":
+            text = " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+        else:
+            if rng.random() < 0.2:
+                words.insert(rng.randrange(len(words)), rng.choice(FILLERS))
+            text = " ".join(previous[-3:] + words)
+            if rng.random() < 0.03:
+                text = "[Music]"
+            previous = words
+        duration = round(len(words) * seconds_per_word, 3)
+        segments.append({"text": text, "start": round(start, 3), "duration": duration})
+        written += len(words)
+        start += duration
+    return segments
+
+def load_recorded_cases(directory: str) -> List[Dict[str, Any]]:
+    """Load recorded transcripts: *.json segment lists or *.txt files with one caption line per line
+
+    Files whose name contains "auto" are treated as auto-generated captions.
+    """
+    cases = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        path = os.path.join(directory, name)
+        if extension == ".json":
+            with open(path, encoding="utf-8") as f:
+                segments = json.load(f)
+        elif extension == ".txt":
+            with open(path, encoding="utf-8") as f:
+                lines = [line.strip() for line in f if line.strip()]
+            segments, start = [], 0.0
+            for line in lines:
+                duration = len(line.split()) * 60.0 / WORDS_PER_MINUTE
+                segments.append({"text": line, "start": start, "duration": duration})
+                start += duration
+        else:
+            continue
+        end = max((segment["start"] + segment["duration"] for segment in segments), default=0.0)
+        cases.append({
+            "name": stem,
+            "kind": "auto" if "auto" in stem.lower() else "manual",
+            "minutes": round(end / 60.0, 1),
+            "segments": segments,
+        })
+    return cases
+
+def synthetic_cases(minutes: List[float], kinds: List[str]) -> List[Dict[str, Any]]:
+    return [
+        {"name": f"{kind}-{length:g}min", "kind": kind, "minutes": length, "segments": synthetic_segments(length, kind)}
+        for length in minutes
+        for kind in kinds
+    ]
+
+class FakeTranscript:
+    def __init__(self, segments: List[Dict[str, Any]], latency: float):
+        self.segments = segments
+        self.latency = latency
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        time.sleep(self.latency)
+        return [dict(segment) for segment in self.segments]
+
+class FakeTranscriptList:
+    """Stand-in for youtube_transcript_api's TranscriptList of a single track"""
+
+    def __init__(self, language_code: str, transcript: FakeTranscript):
+        self.language_code = language_code
+        self.transcript = transcript
+
+    def find_transcript(self, language_codes: List[str]) -> FakeTranscript:
+        if self.language_code not in language_codes:
+            raise LookupError(f"No transcript in {language_codes}")
+        return self.transcript
+
+class StageTimer:
+    """Accumulate wall time per pipeline stage
+
+    Stages entered while another one is running on the same thread are
+    charged to the outer stage, so the summarize_chunks calls made by the
+    reduce stage count as reduce time rather than map time.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - started
+
+    def wrap(self, name: str, fn, **defaults):
+        def timed(*args, **kwargs):
+            for key, value in defaults.items():
+                kwargs.setdefault(key, value)
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return timed
+
+def fake_backends(**settings) -> Callable[..., FakeBackend]:
+    """Stand-in for summarizer.get_llm_backend giving each routed model and output cap its own fake backend"""
+    @lru_cache(maxsize=None)
+    def build(model_name: Optional[str], max_tokens: int) -> FakeBackend:
+        return FakeBackend(model_name=model_name, max_tokens=max_tokens, **settings)
+
+    def get_llm_backend(backend=None, api_key=None, model_name=None, max_tokens=summarizer.LLM_MAX_TOKENS):
+        return build(model_name, max_tokens)
+    return get_llm_backend
+
+def run_case(case: Dict[str, Any], video_id: str, concurrency: int, backends: Callable[..., FakeBackend], cache_dir: str,
+             fetch_latency: float, target_language: Optional[str]) -> Dict[str, Any]:
+    """Run one transcript through the whole pipeline with every network call simulated"""
+    timer = StageTimer()
+    usage = summarizer.TokenUsage()
+    chunk_counts = []
+    real_split_transcript = summarizer.split_transcript
+
+    def split_transcript(*args, **kwargs):
+        chunks = real_split_transcript(*args, **kwargs)
+        chunk_counts.append(len(chunks))
+        return chunks
+
+    tracks = [{"code": "en", "name": "English", "is_generated": case["kind"] == "auto"}]
+    duration = int(case["minutes"] * 60)
+    transcript_list = FakeTranscriptList("en", FakeTranscript(case["segments"], fetch_latency))
+
+    patches = [
+        mock.patch.object(youtube, "fetch_oembed", return_value={"title": case["name"], "author_name": "benchmark"}),
+        mock.patch.object(youtube, "fetch_watch_page_metadata", return_value=(tracks, duration)),
+        mock.patch.object(youtube, "list_transcripts", return_value=transcript_list),
+        mock.patch.object(youtube, "fetch_with_pytube", return_value=None),
+        mock.patch.object(youtube, "get_transcript_cache",
+                          return_value=TranscriptCache(os.path.join(cache_dir, f"{video_id}.sqlite3"))),
+        mock.patch.object(summarizer, "get_result_cache", return_value=ResultCache(path="")),
+        mock.patch.object(summarizer, "get_llm_backend", side_effect=backends),
+        mock.patch.object(summarizer, "get_video_transcript", timer.wrap("fetch", summarizer.get_video_transcript)),
+        mock.patch.object(summarizer, "normalize_transcript", timer.wrap("normalize", summarizer.normalize_transcript)),
+        mock.patch.object(summarizer, "split_transcript", timer.wrap("split", split_transcript)),
+        mock.patch.object(summarizer, "summarize_chunks",
+                          timer.wrap("map", summarizer.summarize_chunks, max_workers=concurrency)),
+        mock.patch.object(summarizer, "reduce_summaries", timer.wrap("reduce", summarizer.reduce_summaries)),
+        mock.patch.object(summarizer, "stream_chain", timer.wrap("final", summarizer.stream_chain)),
+    ]
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        for patch in patches:
+            stack.enter_context(patch)
+        # Keep the pipeline's diagnostics out of the JSON on stdout
+        stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        trace = stack.enter_context(trace_run())
+        summary = summarizer.summarize_video(
+            f"https://www.youtube.com/watch?v={video_id}", "en", usage=usage, on_token=lambda token: None
+        )
+        if target_language:
+            with timer.stage("translate"):
+                summarizer.translate_summary(summary, target_language, usage=usage, on_token=lambda token: None)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "case": case["name"],
+        "kind": case["kind"],
+        "minutes": case["minutes"],
+        "concurrency": concurrency,
+        "transcript_tokens": usage.transcript_tokens,
+        "transcript_tokens_removed": usage.transcript_tokens_removed,
+        "chunks": chunk_counts[0] if chunk_counts else 0,
+        "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timer.seconds.items()},
+        "total_ms": round(elapsed * 1000, 1),
+        "llm_calls": usage.calls,
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cost_usd": round(usage.cost_usd, 6),
+        "routes": {
+            route: dict(stats, seconds=round(stats["seconds"], 3), cost_usd=round(stats["cost_usd"], 6))
+            for route, stats in usage.routes.items()
+        },
+        "peak_memory_mb": round(peak / 2 ** 20, 2),
+        "spans": trace.breakdown(),
+        "counters": trace.counters,
+        "transcript_tokens_per_second": round(usage.transcript_tokens / elapsed, 1) if elapsed else None,
+        "video_minutes_per_second": round(case["minutes"] / elapsed, 3) if elapsed else None,
+    }
+
+def summarize_throughput(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Aggregate throughput per concurrency level over every case"""
+    levels = {}
+    for run in runs:
+        level = levels.setdefault(str(run["concurrency"]), {"runs": 0, "seconds": 0.0, "tokens": 0, "minutes": 0.0})
+        level["runs"] += 1
+        level["seconds"] += run["total_ms"] / 1000
+        level["tokens"] += run["transcript_tokens"]
+        level["minutes"] += run["minutes"]
+    return {
+        concurrency: {
+            "runs": level["runs"],
+            "total_seconds": round(level["seconds"], 3),
+            "transcript_tokens_per_second": round(level["tokens"] / level["seconds"], 1) if level["seconds"] else None,
+            "video_minutes_per_second": round(level["minutes"] / level["seconds"], 3) if level["seconds"] else None,
+        }
+        for concurrency, level in levels.items()
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the summarization pipeline offline")
+    parser.add_argument("--minutes", type=float, nargs="+", default=DEFAULT_MINUTES,
+                        help="lengths of the synthetic transcripts")
+    parser.add_argument("--kinds", nargs="+", choices=CAPTION_KINDS, default=list(CAPTION_KINDS),
+                        help="caption styles of the synthetic transcripts")
+    parser.add_argument("--transcripts", default=None,
+                        help="directory of recorded transcripts (*.json segments or *.txt lines) to use instead")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="map concurrency levels")
+    parser.add_argument("--translate", default="Spanish", help="target language of the translation stage, '' to skip")
+    parser.add_argument("--fetch-latency", type=float, default=0.2,
+                        help="simulated transcript download time, keep below TRANSCRIPT_HEDGE_DELAY")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="simulated seconds before the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=800, help="simulated generation speed")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="share of simulated LLM calls that fail")
+    parser.add_argument("-o", "--output", default=None, help="file to write the JSON result to")
+    parser.add_argument("--history", default=None, help="JSONL file to append the result to")
+    args = parser.parse_args(argv)
+
+    if args.transcripts:
+        cases = load_recorded_cases(args.transcripts)
+    else:
+        cases = synthetic_cases(args.minutes, args.kinds)
+    backends = fake_backends(
+        latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        failure_rate=args.llm_failure_rate
+    )
+
+    runs = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for concurrency in args.concurrency:
+            for case in cases:
+                # A fresh video ID per run keeps every cache cold
+                video_id = f"bench{len(runs):06d}"
+                run = run_case(case, video_id, concurrency, backends, cache_dir, args.fetch_latency, args.translate)
+                print(f"{run['case']} @ {concurrency}: {run['total_ms']} ms", file=sys.stderr)
+                runs.append(run)
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "settings": {
+            "fetch_latency": args.fetch_latency,
+            "llm_latency": args.llm_latency,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+            "llm_failure_rate": args.llm_failure_rate,
+            "chunk_max_tokens": summarizer.CHUNK_MAX_TOKENS,
+            "reduce_token_budget": summarizer.REDUCE_TOKEN_BUDGET,
+            "translate": args.translate or None,
+            "llm_routes": LLM_ROUTES or "default",
+        },
+        "runs": runs,
+        "throughput": summarize_throughput(runs),
+    }
+
+    print(json.dumps(record, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
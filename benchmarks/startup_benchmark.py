@@ -0,0 +1,99 @@
+"""Measure cold import time of the app modules and their heavy dependencies.
+
+    python benchmarks/startup_benchmark.py --runs 5 --history benchmarks/startup_history.jsonl
+
+Every measurement imports the target in a fresh interpreter, so nothing is
+shared between runs. Results are printed as JSON; with --history the record
+is also appended to a JSONL file so import latency can be tracked over time.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional, Dict, Any, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules of this repo, in the order a cold start touches them
+APP_MODULES = ["youtube", "app", "summarizer", "batch"]
+
+# Third party imports worth watching, most of them only used on fallback paths
+DEPENDENCIES = [
+    "streamlit",
+    "youtube_transcript_api",
+    "langchain_groq",
+    "langchain.chains",
+    "pytube",
+    "googleapiclient.discovery",
+    "google.generativeai",
+]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+def time_import(module: str) -> Optional[float]:
+    """Import module in a fresh interpreter and return the seconds it took, or None if it failed"""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def benchmark(modules: List[str], runs: int) -> Dict[str, Any]:
+    """Time each module over several runs and summarize the samples"""
+    results = {}
+    for module in modules:
+        samples = [time_import(module) for _ in range(runs)]
+        if any(sample is None for sample in samples):
+            results[module] = {"error": "import failed"}
+            continue
+        results[module] = {
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+        }
+    return results
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cold start import latency")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--history", default=None, help="JSONL file to append the result to")
+    parser.add_argument("--skip-dependencies", action="store_true", help="only time the app modules")
+    args = parser.parse_args(argv)
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "modules": benchmark(APP_MODULES, args.runs),
+    }
+    if not args.skip_dependencies:
+        record["dependencies"] = benchmark(DEPENDENCIES, args.runs)
+
+    print(json.dumps(record, indent=2))
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
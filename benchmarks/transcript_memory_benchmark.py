@@ -0,0 +1,155 @@
+"""Compare the memory held by a transcript as dicts and strings and as a CompactTranscript.
+
+    python benchmarks/transcript_memory_benchmark.py --minutes 10 60 180 --sessions 50
+
+For each synthetic (or --transcripts recorded) transcript, starting from the
+JSON the transcript API returns, the benchmark measures with tracemalloc:
+
+    dict_list         the segment dicts, the TextFormatter string and its
+                      split_transcript chunks, as before CompactTranscript
+    compact_summary   a CompactTranscript loaded from the compressed cache
+                      format, its decoded text and split_transcript chunks,
+                      as the summary path holds them now
+    compact_chapters  the same CompactTranscript windowed into chapters, as
+                      the chapter mode holds it
+
+The summary path still chunks decoded text, because normalization and
+extractive compression rewrite it, so its savings come only from the
+segments being columnar; only the chapter mode windows the arrays directly.
+
+Each path reports the memory still held once it is built, its peak while
+building and the time taken, plus that memory times --sessions for a server
+holding one transcript per session. The size of a transcript cache entry is
+reported for the old JSON segments plus text and for the compressed
+CompactTranscript that is now stored alone. With --history the record is
+also appended to a JSONL file.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Optional, Any, Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from youtube_transcript_api.formatters import TextFormatter  # noqa: E402
+
+import summarizer  # noqa: E402
+from chapters import window_segments  # noqa: E402
+from compact_transcript import CompactTranscript  # noqa: E402
+from pipeline_benchmark import CAPTION_KINDS, load_recorded_cases, synthetic_cases  # noqa: E402
+from startup_benchmark import git_revision  # noqa: E402
+
+DEFAULT_MINUTES = [10, 60, 180]
+
+def measure(build: Callable[[], Any]) -> Dict[str, Any]:
+    """Run build under tracemalloc and report what its result holds, its peak and its duration"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "held_mb": round(held / 2 ** 20, 3),
+        "peak_mb": round(peak / 2 ** 20, 3),
+        "ms": round(elapsed * 1000, 2),
+    }
+
+def run_case(case: Dict[str, Any], sessions: int) -> Dict[str, Any]:
+    raw = json.dumps(case["segments"])
+    built = CompactTranscript.from_segments(case["segments"])
+    compressed = built.dumps()
+
+    def dict_list():
+        segments = json.loads(raw)
+        text = TextFormatter().format_transcript(segments)
+        return segments, text, summarizer.split_transcript(text)
+
+    def compact_summary():
+        transcript = CompactTranscript.loads(compressed)
+        text = transcript.text
+        return transcript, text, summarizer.split_transcript(text)
+
+    def compact_chapters():
+        transcript = CompactTranscript.loads(compressed)
+        return transcript, window_segments(transcript)
+
+    paths = {
+        "dict_list": measure(dict_list),
+        "compact_summary": measure(compact_summary),
+        "compact_chapters": measure(compact_chapters),
+    }
+    for result in paths.values():
+        result["held_mb_all_sessions"] = round(result["held_mb"] * sessions, 1)
+        result["held_vs_dict_list"] = (
+            round(result["held_mb"] / paths["dict_list"]["held_mb"], 3) if paths["dict_list"]["held_mb"] else None
+        )
+    return {
+        "case": case["name"],
+        "kind": case["kind"],
+        "minutes": case["minutes"],
+        "segments": len(built),
+        "text_mb": round(len(built.text_bytes()) / 2 ** 20, 3),
+        "cache_entry_kb": {
+            "json_and_text": round((len(raw.encode("utf-8")) + len(built.text_bytes())) / 1024, 1),
+            "compact_compressed": round(len(compressed) / 1024, 1),
+        },
+        "paths": paths,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare transcript memory as dicts and strings and as CompactTranscript")
+    parser.add_argument("--minutes", type=float, nargs="+", default=DEFAULT_MINUTES,
+                        help="lengths of the synthetic transcripts")
+    parser.add_argument("--kinds", nargs="+", choices=CAPTION_KINDS, default=list(CAPTION_KINDS),
+                        help="caption styles of the synthetic transcripts")
+    parser.add_argument("--transcripts", default=None,
+                        help="directory of recorded transcripts (*.json segments or *.txt lines) to use instead")
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent sessions to project the memory for")
+    parser.add_argument("-o", "--output", default=None, help="file to write the JSON result to")
+    parser.add_argument("--history", default=None, help="JSONL file to append the result to")
+    args = parser.parse_args(argv)
+
+    if args.transcripts:
+        cases = load_recorded_cases(args.transcripts)
+    else:
+        cases = synthetic_cases(args.minutes, args.kinds)
+
+    runs = []
+    # Keep the pipeline's diagnostics out of the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        # Load the tokenizer and splitter first so the first case does not pay for them
+        summarizer.split_transcript("warm up")
+        for case in cases:
+            run = run_case(case, args.sessions)
+            print(f"{run['case']}: {run['paths']['dict_list']['held_mb']} MB -> "
+                  f"{run['paths']['compact_summary']['held_mb']} MB", file=sys.stderr)
+            runs.append(run)
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "settings": {"sessions": args.sessions, "chunk_max_tokens": summarizer.CHUNK_MAX_TOKENS},
+        "runs": runs,
+    }
+
+    print(json.dumps(record, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""In-memory and on-disk caches shared by every session of the app."""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
+from dotenv import load_dotenv
+
+from compact_transcript import CompactTranscript
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Transcript cache settings (shared by every session and kept across restarts)
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", os.path.join(".cache", "transcripts.sqlite3"))
+TRANSCRIPT_CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", str(7 * 24 * 3600)))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "5000"))
+
+class TranscriptCache:
+    """SQLite backed transcript cache with TTL expiry and LRU eviction
+
+    Entries may keep the timed caption segments, as a compressed
+    CompactTranscript, for the timestamped chapter mode. The text is then
+    read back from the segments instead of being stored a second time.
+    """
+
+    def __init__(self, path: str, ttl: int = TRANSCRIPT_CACHE_TTL, max_entries: int = TRANSCRIPT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT NOT NULL,
+                language_code TEXT NOT NULL,
+                is_generated INTEGER NOT NULL,
+                transcript TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (video_id, language_code, is_generated)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_last_access ON transcripts (last_access)")
+        # Caches created before timed segments were kept lack the column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(transcripts)")}
+        if "segments" not in columns:
+            self._conn.execute("ALTER TABLE transcripts ADD COLUMN segments TEXT")
+        self._conn.commit()
+
+    def _record(self, found: bool):
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def get(self, video_id: str, language_code: Optional[str] = None, is_generated: Optional[bool] = None) -> Optional[str]:
+        """Return a fresh cached transcript, or None on a miss.
+
+        Leaving language_code or is_generated unset matches any track of the
+        video, preferring manually created captions.
+        """
+        row = self._lookup(("transcript", "segments"), video_id, language_code, is_generated)
+        if row is None:
+            return None
+        transcript, segments = row
+        # Entries with timed segments keep their text only in the segments blob
+        if not transcript and segments is not None:
+            return self._decode_segments(segments).text
+        return transcript
+
+    def get_segments(self, video_id: str, language_code: Optional[str] = None,
+                     is_generated: Optional[bool] = None) -> Optional[CompactTranscript]:
+        """Return the timed segments of a fresh cached transcript, or None when missing or stored without them"""
+        row = self._lookup(("segments",), video_id, language_code, is_generated, required="segments")
+        if row is None:
+            return None
+        return self._decode_segments(row[0])
+
+    @staticmethod
+    def _decode_segments(segments) -> CompactTranscript:
+        # Entries written before segments were stored compactly hold JSON
+        if isinstance(segments, str):
+            return CompactTranscript.from_segments(json.loads(segments))
+        return CompactTranscript.loads(segments)
+
+    def _lookup(self, columns: Tuple[str, ...], video_id: str, language_code: Optional[str],
+                is_generated: Optional[bool], required: Optional[str] = None) -> Optional[Tuple]:
+        query = (
+            f"SELECT language_code, is_generated, {', '.join(columns)} FROM transcripts "
+            "WHERE video_id = ? AND created_at >= ?"
+        )
+        params = [video_id, time.time() - self.ttl]
+        if required is not None:
+            query += f" AND {required} IS NOT NULL"
+        if language_code is not None:
+            query += " AND language_code = ?"
+            params.append(language_code)
+        if is_generated is not None:
+            query += " AND is_generated = ?"
+            params.append(int(is_generated))
+        query += " ORDER BY is_generated ASC, last_access DESC LIMIT 1"
+
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            self._record(row is not None)
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE transcripts SET last_access = ? WHERE video_id = ? AND language_code = ? AND is_generated = ?",
+                (time.time(), video_id, row[0], row[1])
+            )
+            self._conn.commit()
+            return row[2:]
+
+    def set(self, video_id: str, language_code: str, is_generated: bool, transcript: str,
+            segments: Optional[CompactTranscript] = None):
+        """Store a transcript and evict the least recently used entries over the size cap
+
+        When segments decode to exactly transcript, only the segments are
+        kept and the text column is left empty.
+        """
+        now = time.time()
+        if segments is not None and len(segments) and segments.text == transcript:
+            transcript = ""
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO transcripts
+                   (video_id, language_code, is_generated, transcript, created_at, last_access, segments)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (video_id, language_code, int(is_generated), transcript, now, now,
+                 segments.dumps() if segments is not None else None)
+            )
+            self._conn.execute("DELETE FROM transcripts WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                """DELETE FROM transcripts WHERE rowid IN (
+                    SELECT rowid FROM transcripts ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current number of entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': entries
+        }
+
+@lru_cache(maxsize=1)
+def get_transcript_cache() -> TranscriptCache:
+    """Return the process wide transcript cache shared across Streamlit sessions"""
+    return TranscriptCache(TRANSCRIPT_CACHE_PATH)
+
+# Caption track registry settings
+CAPTION_REGISTRY_TTL = int(os.getenv("CAPTION_REGISTRY_TTL", "1800"))
+CAPTION_REGISTRY_MAX_ENTRIES = int(os.getenv("CAPTION_REGISTRY_MAX_ENTRIES", "1024"))
+
+class TTLCache:
+    """Thread safe in-memory LRU mapping whose entries expire after ttl seconds"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+@lru_cache(maxsize=1)
+def get_caption_registry() -> TTLCache:
+    """Return the caption track registry shared across reruns and sessions"""
+    return TTLCache(CAPTION_REGISTRY_MAX_ENTRIES, CAPTION_REGISTRY_TTL)
+
+# Summary and translation result cache settings
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(24 * 3600)))
+# Set a path to keep results on disk as well as in memory
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+RESULT_CACHE_DISK_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_DISK_MAX_ENTRIES", "20000"))
+
+def content_hash(text: str) -> str:
+    """Return a stable hash identifying a piece of text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """Content addressed LLM result cache with an in-memory LRU and optional SQLite tier
+
+    The SQLite tier drops expired rows and evicts the least recently used
+    ones beyond disk_max_entries on every write, like TranscriptCache.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl: int = RESULT_CACHE_TTL, path: str = RESULT_CACHE_PATH,
+                 disk_max_entries: int = RESULT_CACHE_DISK_MAX_ENTRIES):
+        self.ttl = ttl
+        self.disk_max_entries = disk_max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = TTLCache(max_entries, ttl)
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            # Caches created before LRU eviction lack the column
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+            if "last_access" not in columns:
+                self._conn.execute("ALTER TABLE results ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE results SET last_access = created_at")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return content_hash("\x1f".join(str(part) for part in parts))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is None and self._conn is not None:
+            with self._lock:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT value FROM results WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+            if row is not None:
+                value = row[0]
+                self._memory.set(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        self._memory.set(key, value)
+        if self._conn is not None:
+            now = time.time()
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+                self._conn.execute(
+                    """DELETE FROM results WHERE rowid IN (
+                        SELECT rowid FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (self.disk_max_entries,)
+                )
+                self._conn.commit()
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache:
+    """Return the summary and translation cache shared across Streamlit sessions"""
+    return ResultCache()
+
+# Video probe settings
+VIDEO_PROBE_TTL = int(os.getenv("VIDEO_PROBE_TTL", "1800"))
+VIDEO_PROBE_MAX_ENTRIES = int(os.getenv("VIDEO_PROBE_MAX_ENTRIES", "1024"))
+
+@lru_cache(maxsize=1)
+def get_video_probe_cache() -> TTLCache:
+    """Return the cache of pre-flight video metadata shared across sessions"""
+    return TTLCache(VIDEO_PROBE_MAX_ENTRIES, VIDEO_PROBE_TTL)
@@ -0,0 +1,110 @@
+"""Split timed caption segments into chapters and format them with timestamps.
+
+A chapter covers roughly CHAPTER_SECONDS of video. Within CHAPTER_FLEX of
+that length the boundary moves to the most natural break: the longest pause
+between captions, preferably after a finished sentence. Auto-generated
+captions have neither, so their chapters end closest to the target length.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional, Any, Dict, List, Tuple, Union
+
+from compact_transcript import CompactTranscript, as_compact
+
+# Chapter settings
+CHAPTER_SECONDS = float(os.getenv("CHAPTER_SECONDS", "300"))
+# Chapters may end this share earlier or later than CHAPTER_SECONDS to land on a natural break
+CHAPTER_FLEX = float(os.getenv("CHAPTER_FLEX", "0.3"))
+
+SENTENCE_END_PATTERN = re.compile(r'[.!?]["\')\]]*$')
+# "TITLE: ..." and "SUMMARY: ..." lines, also when the model wraps the labels in Markdown
+TITLE_PATTERN = re.compile(r'^[\W_]*title\W*?:[\s*_]*(.+)$', re.IGNORECASE | re.MULTILINE)
+SUMMARY_PATTERN = re.compile(r'^[\W_]*summary\W*?:[\s*_]*', re.IGNORECASE | re.MULTILINE)
+
+@dataclass
+class Chapter:
+    index: int
+    start: float
+    end: float
+    text: str
+    title: str = ""
+    summary: Optional[str] = None
+
+def break_score(segments: CompactTranscript, index: int, target_end: float, target_seconds: float) -> float:
+    """Rate a break before segment index by the pause before it, a finished sentence and closeness to target_end"""
+    start = segments.starts[index]
+    pause = max(0.0, start - segments.starts[index - 1] - segments.durations[index - 1])
+    sentence = 1.0 if SENTENCE_END_PATTERN.search(segments.segment_text(index - 1).strip()) else 0.0
+    return pause + sentence - 0.5 * abs(start - target_end) / target_seconds
+
+def window_segments(segments: Union[CompactTranscript, List[Dict[str, Any]]], target_seconds: float = CHAPTER_SECONDS,
+                    flex: float = CHAPTER_FLEX) -> List[Chapter]:
+    """Group consecutive segments into chapters of about target_seconds, cut at natural breaks"""
+    segments = as_compact(segments)
+    starts = segments.starts
+    chapters = []
+    first = 0
+    while first < len(segments):
+        window_start = starts[first]
+        target_end = window_start + target_seconds
+        earliest, latest = target_end - flex * target_seconds, target_end + flex * target_seconds
+        cut, best_score = None, float("-inf")
+        index = first + 1
+        while index < len(segments) and starts[index] <= latest:
+            if starts[index] >= earliest:
+                score = break_score(segments, index, target_end, target_seconds)
+                if score > best_score:
+                    cut, best_score = index, score
+            index += 1
+        if index == len(segments):
+            # The rest of the video fits in this chapter
+            cut = len(segments)
+        elif cut is None:
+            # A long silence spans the whole break window
+            cut = index
+        window = segments.slice(first, cut)
+        chapters.append(Chapter(
+            index=len(chapters),
+            start=window_start,
+            end=starts[cut] if cut < len(segments) else window.end,
+            text=window.text
+        ))
+        first = cut
+    return chapters
+
+def parse_chapter_summary(text: str) -> Tuple[str, str]:
+    """Split an LLM answer of the form "TITLE: ... SUMMARY: ..." into title and summary"""
+    title_match = TITLE_PATTERN.search(text)
+    summary_match = SUMMARY_PATTERN.search(text)
+    if summary_match:
+        summary = text[summary_match.end():].strip()
+    elif title_match:
+        summary = text[title_match.end():].strip()
+    else:
+        summary = text.strip()
+    title = title_match.group(1).strip().strip('*"') if title_match else ""
+    return title, summary
+
+def format_timestamp(seconds: float) -> str:
+    """Format a video position as h:mm:ss, or m:ss when under an hour"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def timestamp_url(video_id: str, seconds: float) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}&t={int(seconds)}s"
+
+def format_chapters(chapters: List[Chapter], video_id: str) -> str:
+    """Render the summarized chapters as Markdown, in video order, each headed by a link to its start"""
+    blocks = []
+    for chapter in sorted(chapters, key=lambda chapter: chapter.start):
+        if not chapter.summary:
+            continue
+        heading = f"**[{format_timestamp(chapter.start)}]({timestamp_url(video_id, chapter.start)})**"
+        if chapter.title:
+            heading += f" **{chapter.title}**"
+        blocks.append(f"{heading}\n\n{chapter.summary}")
+    return "\n\n".join(blocks)
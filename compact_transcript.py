@@ -0,0 +1,162 @@
+"""Columnar storage of timed transcripts.
+
+The transcript API returns one dict per caption line, which costs several
+hundred bytes of Python objects per line before the text is even counted.
+CompactTranscript keeps the same data in four flat buffers instead:
+
+    starts     float64 start of every segment, in seconds
+    durations  float32 duration of every segment, in seconds
+    offsets    uint32 byte offset of every segment's text in blob, plus one past the end
+    blob       the segment texts as UTF-8, each followed by a newline
+
+Decoding the blob without its final newline gives exactly the text
+TextFormatter produces, so the transcript cache keeps only this form and
+derives the plain text from it. Slices share the parent's buffers, so
+windowing a transcript into chapters copies nothing until the text of a
+chapter is decoded. The summary path still works on the decoded text, since
+normalization and extractive compression rewrite it across caption lines.
+
+dumps() writes the columns uncompressed and 8 byte aligned, optionally
+followed by the blob compressed with zlib, and loads() reads them back as
+views of the given buffer.
+"""
+import struct
+import sys
+import zlib
+from array import array
+from typing import Optional, Any, Dict, Iterable, Iterator, Union
+
+MAGIC = b"CTR1"
+# magic, flags, segment count, stored blob size
+HEADER = struct.Struct("<4sI4xIQ")
+FLAG_COMPRESSED = 1
+COMPRESSION_LEVEL = 6
+
+def _column(typecode: str, values: Iterable) -> array:
+    column = array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+def _view(buffer: memoryview, typecode: str) -> Union[memoryview, array]:
+    """View little endian buffer as typecode items, copying only on big endian machines"""
+    if sys.byteorder == "little":
+        return buffer.cast("B").cast(typecode)
+    column = array(typecode, bytes(buffer))
+    column.byteswap()
+    return column
+
+class CompactTranscript:
+    """Timed caption segments in flat arrays and one UTF-8 blob
+
+    Indexing with an int gives a {"text", "start", "duration"} dict and
+    with a slice a CompactTranscript view, so it can stand in for the list
+    of dicts the transcript API returns.
+    """
+    __slots__ = ("starts", "durations", "offsets", "blob")
+
+    def __init__(self, starts, durations, offsets, blob):
+        # offsets are absolute positions in blob, which slices share with their parent
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]]) -> "CompactTranscript":
+        starts, durations, offsets = array("d"), array("f"), array("I", [0])
+        texts = []
+        position = 0
+        for segment in segments:
+            text = segment["text"].encode("utf-8") + b"\n"
+            starts.append(segment["start"])
+            durations.append(segment.get("duration", 0.0))
+            position += len(text)
+            offsets.append(position)
+            texts.append(text)
+        return cls(memoryview(starts), memoryview(durations), memoryview(offsets), b"".join(texts))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            first, last, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("CompactTranscript slices must be contiguous")
+            return self.slice(first, last)
+        if index < 0:
+            index += len(self)
+        return {"text": self.segment_text(index), "start": self.starts[index], "duration": self.durations[index]}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def slice(self, first: int, last: int) -> "CompactTranscript":
+        """Return segments first to last, excluded, sharing this transcript's buffers"""
+        last = max(first, last)
+        return CompactTranscript(
+            self.starts[first:last], self.durations[first:last], self.offsets[first:last + 1], self.blob
+        )
+
+    def segment_text(self, index: int) -> str:
+        return bytes(memoryview(self.blob)[self.offsets[index]:self.offsets[index + 1] - 1]).decode("utf-8")
+
+    def text_bytes(self) -> memoryview:
+        """The UTF-8 text of every segment, newline separated, without copying"""
+        if not len(self):
+            return memoryview(b"")
+        return memoryview(self.blob)[self.offsets[0]:self.offsets[len(self)] - 1]
+
+    @property
+    def text(self) -> str:
+        """The transcript as plain text, one segment per line like TextFormatter"""
+        return str(self.text_bytes(), "utf-8")
+
+    @property
+    def end(self) -> float:
+        if not len(self):
+            return 0.0
+        return self.starts[len(self) - 1] + self.durations[len(self) - 1]
+
+    def dumps(self, compress: bool = True, level: int = COMPRESSION_LEVEL) -> bytes:
+        """Serialize to the format read by loads(), compressing the text blob unless compress is False"""
+        text = bytes(self.text_bytes()) + (b"\n" if len(self) else b"")
+        base = self.offsets[0] if len(self) else 0
+        blob = zlib.compress(text, level) if compress else text
+        columns = [
+            _column("d", self.starts),
+            _column("f", self.durations),
+            _column("I", (offset - base for offset in self.offsets[:len(self) + 1]) if len(self) else [0]),
+        ]
+        body = b"".join(column.tobytes() for column in columns)
+        padding = b"\0" * (-len(body) % 8)
+        header = HEADER.pack(MAGIC, FLAG_COMPRESSED if compress else 0, len(self), len(blob))
+        return header + body + padding + blob
+
+    @classmethod
+    def loads(cls, buffer) -> "CompactTranscript":
+        """Read a serialized transcript, viewing the columns in buffer without copying"""
+        view = memoryview(buffer)
+        magic, flags, count, blob_size = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("Not a serialized CompactTranscript")
+        position = HEADER.size
+        starts = _view(view[position:position + 8 * count], "d")
+        position += 8 * count
+        durations = _view(view[position:position + 4 * count], "f")
+        position += 4 * count
+        offsets = _view(view[position:position + 4 * (count + 1)], "I")
+        position += 4 * (count + 1)
+        position += -position % 8
+        blob = view[position:position + blob_size]
+        if flags & FLAG_COMPRESSED:
+            blob = zlib.decompress(blob)
+        return cls(starts, durations, offsets, blob)
+
+def as_compact(segments: Optional[Union[CompactTranscript, Iterable[Dict[str, Any]]]]) -> Optional[CompactTranscript]:
+    """Return segments as a CompactTranscript, converting a list of segment dicts"""
+    if segments is None or isinstance(segments, CompactTranscript):
+        return segments
+    return CompactTranscript.from_segments(segments)
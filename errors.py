@@ -0,0 +1,5 @@
+"""Exceptions shared by the summarizer modules."""
+
+
+class SummarizerError(Exception):
+    """Raised when a video cannot be summarized or translated"""
@@ -0,0 +1,124 @@
+"""Local extractive compression of long transcripts.
+
+Before any LLM call, sentences are scored on the CPU and only the most
+informative ones are kept, in their original order. Two scorers are
+available: "textrank" ranks sentences by their TF-IDF cosine similarity
+graph and "tfidf" scores each sentence by the weight of its terms. Both are
+vectorized with NumPy and need no network access.
+"""
+import re
+from typing import Callable, List, Optional
+
+import numpy as np
+
+EXTRACTIVE_METHODS = ("textrank", "tfidf")
+
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+# Auto-generated captions rarely have punctuation, so long "sentences" are cut into windows
+MAX_SENTENCE_WORDS = 40
+# Keep the term matrix small enough to stay in milliseconds on long videos
+MAX_FEATURES = 2000
+# Beyond this many sentences the quadratic TextRank graph is replaced by TF-IDF scoring
+MAX_TEXTRANK_SENTENCES = 3000
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+ours out over own same she should so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would you your
+yours yourself gonna wanna like know yeah okay right really thing things going get got
+""".split())
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, cutting unpunctuated runs into word windows"""
+    sentences = []
+    for block in text.split('\n\n'):
+        for sentence in SENTENCE_PATTERN.split(block.replace('\n', ' ')):
+            words = sentence.split()
+            for start in range(0, len(words), MAX_SENTENCE_WORDS):
+                sentences.append(' '.join(words[start:start + MAX_SENTENCE_WORDS]))
+    return [sentence for sentence in sentences if sentence]
+
+def tfidf_matrix(sentences: List[str]) -> np.ndarray:
+    """Return L2 normalized TF-IDF rows for the sentences over the most common terms"""
+    tokenized = [
+        [word for word in WORD_PATTERN.findall(sentence.lower()) if word not in STOPWORDS and len(word) > 1]
+        for sentence in sentences
+    ]
+    document_frequency = {}
+    for words in tokenized:
+        for word in set(words):
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+    vocabulary = sorted(document_frequency, key=document_frequency.get, reverse=True)[:MAX_FEATURES]
+    index = {word: column for column, word in enumerate(vocabulary)}
+
+    rows, columns = [], []
+    for row, words in enumerate(tokenized):
+        for word in words:
+            column = index.get(word)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    counts = np.zeros((len(sentences), len(vocabulary)), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1.0)
+
+    df = np.array([document_frequency[word] for word in vocabulary], dtype=np.float32)
+    idf = np.log((1.0 + len(sentences)) / (1.0 + df)) + 1.0
+    weights = counts * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.maximum(norms, 1e-9)
+
+def textrank_scores(matrix: np.ndarray, damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """Rank sentences by power iteration over their cosine similarity graph"""
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, row_sums, out=np.zeros_like(similarity), where=row_sums > 0)
+
+    count = matrix.shape[0]
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1.0 - damping) / count + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+def tfidf_scores(matrix: np.ndarray) -> np.ndarray:
+    """Score sentences by how close they are to the transcript's overall term profile"""
+    centroid = matrix.sum(axis=0)
+    norm = np.linalg.norm(centroid)
+    if norm == 0:
+        return np.zeros(matrix.shape[0], dtype=np.float32)
+    return matrix @ (centroid / norm)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+def compress_transcript(text: str, ratio: float = 0.5, max_tokens: Optional[int] = None, method: str = "textrank",
+                        count_tokens: Callable[[str], int] = estimate_tokens) -> str:
+    """Keep the highest scoring sentences up to ratio of the tokens (or max_tokens), in original order"""
+    if method not in EXTRACTIVE_METHODS:
+        raise ValueError(f"Unknown extractive method {method!r}, expected one of {EXTRACTIVE_METHODS}")
+    sentences = split_sentences(text)
+    if len(sentences) < 3:
+        return text
+
+    sentence_tokens = np.array([count_tokens(sentence) for sentence in sentences])
+    budget = int(sentence_tokens.sum() * ratio)
+    if max_tokens is not None:
+        budget = min(budget, max_tokens)
+
+    matrix = tfidf_matrix(sentences)
+    if method == "textrank" and len(sentences) <= MAX_TEXTRANK_SENTENCES:
+        scores = textrank_scores(matrix)
+    else:
+        scores = tfidf_scores(matrix)
+
+    # Greedily take the best sentences while they fit, then restore transcript order
+    order = np.argsort(-scores, kind="stable")
+    fits = np.cumsum(sentence_tokens[order]) <= budget
+    selected = np.sort(order[fits]) if fits.any() else np.sort(order[:1])
+    return '\n'.join(sentences[index] for index in selected)
@@ -0,0 +1,119 @@
+"""Background jobs so long summaries survive Streamlit reruns.
+
+The UI submits work and keeps only the job ID; a bounded pool of worker
+threads runs the pipeline while any number of reruns or reconnects poll
+the job for progress and, eventually, its result.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional, Any, Callable, Dict, List
+
+from caches import TTLCache
+from errors import SummarizerError
+from metrics import count, trace_run
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Jobs queued or running at once before new submissions are refused
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "16"))
+# Finished jobs stay retrievable for this long
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))
+JOB_MAX_STORED = int(os.getenv("JOB_MAX_STORED", "1000"))
+
+class QueueFull(Exception):
+    """Raised when the job queue is at capacity"""
+
+@dataclass
+class Job:
+    """State of one background job, updated by its worker and read by the UI
+
+    trace holds the timing spans and counters recorded while the job ran
+    and state whatever the job keeps to be resumed, such as a PipelineState.
+    """
+    id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"
+    stage: Optional[str] = None
+    done: int = 0
+    total: int = 0
+    partial: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    notices: List[str] = field(default_factory=list)
+    usage: Any = None
+    trace: Any = None
+    state: Any = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def set_progress(self, stage: str, done: int, total: int):
+        self.stage, self.done, self.total = stage, done, total
+
+    def append_text(self, token: str):
+        self.partial += token
+
+class JobQueue:
+    """Bounded worker pool whose jobs can be looked up by ID until they expire"""
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING,
+                 ttl: int = JOB_TTL, max_stored: int = JOB_MAX_STORED):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = TTLCache(max_stored, ttl)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], params: Optional[Dict[str, Any]] = None) -> Job:
+        """Queue fn(job) to run in the background, raising QueueFull at capacity
+
+        params are kept on the job so a reconnecting client can restore its inputs.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull()
+            self._pending += 1
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=dict(params or {}))
+        self._jobs.set(job.id, job)
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        job.status = "running"
+        try:
+            with trace_run() as job.trace:
+                job.result = fn(job)
+            job.status = "done"
+        except SummarizerError as e:
+            job.error = str(e)
+            job.status = "failed"
+        except Exception as e:
+            job.error = f"Unexpected error: {str(e)}"
+            job.status = "failed"
+        finally:
+            count("jobs_total", kind=job.kind, status=job.status)
+            job.finished_at = time.time()
+            # Refresh the entry so the expiry counts from completion
+            self._jobs.set(job.id, job)
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    """Return the job queue shared by every Streamlit session"""
+    return JobQueue()
@@ -0,0 +1,142 @@
+"""Languages offered for summary translation."""
+
+# List of supported languages for translation
+SUPPORTED_LANGUAGES = [
+    {"name": "English", "code": "en"},
+    {"name": "Bengali", "code": "bn"},
+    {"name": "Hindi", "code": "hi"},
+    {"name": "Spanish", "code": "es"},
+    {"name": "French", "code": "fr"},
+    {"name": "German", "code": "de"},
+    {"name": "Italian", "code": "it"},
+    {"name": "Portuguese", "code": "pt"},
+    {"name": "Russian", "code": "ru"},
+    {"name": "Japanese", "code": "ja"},
+    {"name": "Korean", "code": "ko"},
+    {"name": "Chinese (Simplified)", "code": "zh"},
+    {"name": "Arabic", "code": "ar"},
+    {"name": "Dutch", "code": "nl"},
+    {"name": "Turkish", "code": "tr"},
+    {"name": "Polish", "code": "pl"},
+    {"name": "Ukrainian", "code": "uk"},
+    {"name": "Vietnamese", "code": "vi"},
+    {"name": "Thai", "code": "th"},
+    {"name": "Indonesian", "code": "id"},
+    {"name": "Malay", "code": "ms"},
+    {"name": "Swedish", "code": "sv"},
+    {"name": "Norwegian", "code": "no"},
+    {"name": "Danish", "code": "da"},
+    {"name": "Finnish", "code": "fi"},
+    {"name": "Greek", "code": "el"},
+    {"name": "Hebrew", "code": "he"},
+    {"name": "Romanian", "code": "ro"},
+    {"name": "Hungarian", "code": "hu"},
+    {"name": "Czech", "code": "cs"},
+    {"name": "Slovak", "code": "sk"},
+    {"name": "Croatian", "code": "hr"},
+    {"name": "Serbian", "code": "sr"},
+    {"name": "Bulgarian", "code": "bg"},
+    {"name": "Slovenian", "code": "sl"},
+    {"name": "Estonian", "code": "et"},
+    {"name": "Latvian", "code": "lv"},
+    {"name": "Lithuanian", "code": "lt"},
+    {"name": "Icelandic", "code": "is"},
+    {"name": "Maltese", "code": "mt"},
+    {"name": "Welsh", "code": "cy"},
+    {"name": "Irish", "code": "ga"},
+    {"name": "Scottish Gaelic", "code": "gd"},
+    {"name": "Manx", "code": "gv"},
+    {"name": "Cornish", "code": "kw"},
+    {"name": "Breton", "code": "br"},
+    {"name": "Basque", "code": "eu"},
+    {"name": "Catalan", "code": "ca"},
+    {"name": "Galician", "code": "gl"},
+    {"name": "Afrikaans", "code": "af"},
+    {"name": "Swahili", "code": "sw"},
+    {"name": "Zulu", "code": "zu"},
+    {"name": "Xhosa", "code": "xh"},
+    {"name": "Yoruba", "code": "yo"},
+    {"name": "Igbo", "code": "ig"},
+    {"name": "Hausa", "code": "ha"},
+    {"name": "Somali", "code": "so"},
+    {"name": "Amharic", "code": "am"},
+    {"name": "Oromo", "code": "om"},
+    {"name": "Tigrinya", "code": "ti"},
+    {"name": "Kinyarwanda", "code": "rw"},
+    {"name": "Kirundi", "code": "rn"},
+    {"name": "Malagasy", "code": "mg"},
+    {"name": "Sesotho", "code": "st"},
+    {"name": "Setswana", "code": "tn"},
+    {"name": "Siswati", "code": "ss"},
+    {"name": "Tsonga", "code": "ts"},
+    {"name": "Venda", "code": "ve"},
+    {"name": "Ndebele", "code": "nd"},
+    {"name": "Shona", "code": "sn"},
+    {"name": "Chichewa", "code": "ny"},
+    {"name": "Tswana", "code": "tn"},
+    {"name": "Sotho", "code": "st"},
+    {"name": "Tamil", "code": "ta"},
+    {"name": "Telugu", "code": "te"},
+    {"name": "Kannada", "code": "kn"},
+    {"name": "Malayalam", "code": "ml"},
+    {"name": "Gujarati", "code": "gu"},
+    {"name": "Marathi", "code": "mr"},
+    {"name": "Punjabi", "code": "pa"},
+    {"name": "Urdu", "code": "ur"},
+    {"name": "Nepali", "code": "ne"},
+    {"name": "Sinhala", "code": "si"},
+    {"name": "Burmese", "code": "my"},
+    {"name": "Khmer", "code": "km"},
+    {"name": "Lao", "code": "lo"},
+    {"name": "Mongolian", "code": "mn"},
+    {"name": "Tibetan", "code": "bo"},
+    {"name": "Uyghur", "code": "ug"},
+    {"name": "Kazakh", "code": "kk"},
+    {"name": "Kyrgyz", "code": "ky"},
+    {"name": "Uzbek", "code": "uz"},
+    {"name": "Turkmen", "code": "tk"},
+    {"name": "Tajik", "code": "tg"},
+    {"name": "Pashto", "code": "ps"},
+    {"name": "Dari", "code": "prs"},
+    {"name": "Kurdish", "code": "ku"},
+    {"name": "Persian", "code": "fa"},
+    {"name": "Sindhi", "code": "sd"},
+    {"name": "Balochi", "code": "bal"},
+    {"name": "Kashmiri", "code": "ks"},
+    {"name": "Dogri", "code": "doi"},
+    {"name": "Konkani", "code": "kok"},
+    {"name": "Manipuri", "code": "mni"},
+    {"name": "Bodo", "code": "brx"},
+    {"name": "Sanskrit", "code": "sa"},
+    {"name": "Maithili", "code": "mai"},
+    {"name": "Santali", "code": "sat"},
+    {"name": "Nepali", "code": "ne"},
+    {"name": "Sikkimese", "code": "sip"},
+    {"name": "Ladakhi", "code": "lbj"},
+    {"name": "Tulu", "code": "tcy"},
+    {"name": "Kodava", "code": "kfa"},
+    {"name": "Toda", "code": "tcx"},
+    {"name": "Badaga", "code": "bfq"},
+    {"name": "Kurumba", "code": "kfi"},
+    {"name": "Irula", "code": "iru"},
+    {"name": "Paniya", "code": "pcg"},
+    {"name": "Mullu Kurumba", "code": "kfi"},
+    {"name": "Betta Kurumba", "code": "kfi"},
+    {"name": "Mala Malasar", "code": "ymr"},
+    {"name": "Mala Arayan", "code": "ymr"},
+    {"name": "Mannan", "code": "mjv"},
+    {"name": "Muthuvan", "code": "muv"},
+    {"name": "Hill Pandaram", "code": "pci"},
+    {"name": "Malapandaram", "code": "mjp"},
+    {"name": "Urali", "code": "url"},
+    {"name": "Mannan", "code": "mjv"},
+    {"name": "Muthuvan", "code": "muv"},
+    {"name": "Hill Pandaram", "code": "pci"},
+    {"name": "Malapandaram", "code": "mjp"},
+    {"name": "Urali", "code": "url"},
+    {"name": "Mannan", "code": "mjv"},
+    {"name": "Muthuvan", "code": "muv"},
+    {"name": "Hill Pandaram", "code": "pci"},
+    {"name": "Malapandaram", "code": "mjp"},
+    {"name": "Urali", "code": "url"}
+]
@@ -0,0 +1,388 @@
+"""LLM providers behind one interface.
+
+Every backend wraps a LangChain chat model, so the summarizer chains run
+unchanged whichever provider is configured, and adds invoke, batch, stream
+and token counting helpers for callers that only need text in and out.
+
+    groq    ChatGroq (default, needs GROQ_API_KEYS or GROQ_API_KEY); calls
+            are spread over every configured key within its rate limits
+    gemini  Google Gemini (needs GOOGLE_API_KEY)
+    fake    local stand-in with configurable latency, throughput and
+            failure rate, for offline load tests and profiling
+
+Backends are built once per configuration by get_backend and reused, so
+HTTP clients and their connection pools are shared across calls.
+"""
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional, Any, Dict, Iterator, List, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+
+from errors import SummarizerError
+from metrics import count
+from rate_limits import KeyPool, KeyState, is_rate_limited, is_transient, retry_after_seconds, transient_backoff
+
+load_dotenv()
+
+# Backend used when none is requested explicitly
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+# Overrides the backend's default model when set
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME")
+
+# Groq key pool settings, per key and model as enforced by Groq
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))
+# Longest a call waits for a key before failing
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+# Calls tried on another key after a 429
+RATE_LIMIT_MAX_ATTEMPTS = int(os.getenv("RATE_LIMIT_MAX_ATTEMPTS", "4"))
+# Retries after a 5xx or connection error, as the Groq SDK's own default
+TRANSIENT_MAX_RETRIES = int(os.getenv("TRANSIENT_MAX_RETRIES", "2"))
+
+# Local stand-in settings
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.05"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+_encoding_lock = threading.Lock()
+
+def get_token_encoding():
+    """Return the tiktoken encoding used for counting, or None when unavailable"""
+    # Concurrent first calls would otherwise all try to load the encoding
+    with _encoding_lock:
+        return load_token_encoding()
+
+@lru_cache(maxsize=1)
+def load_token_encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"Tokenizer unavailable, estimating token counts: {str(e)}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count LLM tokens in text, estimating about 4 characters per token without tiktoken"""
+    encoding = get_token_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def messages_to_text(messages: List[BaseMessage]) -> str:
+    return "\n\n".join(str(message.content) for message in messages)
+
+class SimulatedFailure(Exception):
+    """Raised by the local stand-in to mimic a failed provider call"""
+
+class LocalChatModel(BaseChatModel):
+    """Deterministic chat model that answers with the start of its prompt.
+
+    The reply is the first summary_ratio of the prompt's words, capped at
+    max_tokens words, so the same prompt always gives the same answer.
+    latency is waited before the first token and tokens_per_second paces
+    the rest; failure_rate is the share of calls that raise
+    SimulatedFailure, drawn from a generator seeded with seed.
+    """
+    latency: float = FAKE_LLM_LATENCY
+    tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND
+    failure_rate: float = FAKE_LLM_FAILURE_RATE
+    seed: int = FAKE_LLM_SEED
+    max_tokens: int = 2048
+    summary_ratio: float = 0.2
+
+    _random: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-fake"
+
+    def _reply_words(self, messages: List[BaseMessage]) -> List[str]:
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+        time.sleep(self.latency)
+        if failed:
+            raise SimulatedFailure("Simulated LLM failure")
+        words = messages_to_text(messages).split()
+        return words[:max(1, min(self.max_tokens, int(len(words) * self.summary_ratio)))]
+
+    def _pace(self, tokens: int):
+        if self.tokens_per_second > 0:
+            time.sleep(tokens / self.tokens_per_second)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        words = self._reply_words(messages)
+        self._pace(len(words))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        words = self._reply_words(messages)
+        for index, word in enumerate(words):
+            self._pace(1)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else " " + word))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+class GeminiChatModel(BaseChatModel):
+    """Chat model over google.generativeai, which has no LangChain integration installed here"""
+    model_name: str = "gemini-pro"
+    temperature: float = 0.3
+    max_tokens: int = 2048
+
+    _model: Any = PrivateAttr()
+
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(**kwargs)
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(
+            self.model_name,
+            generation_config={"temperature": self.temperature, "max_output_tokens": self.max_tokens}
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "gemini"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        response = self._model.generate_content(messages_to_text(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response.text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for part in self._model.generate_content(messages_to_text(messages), stream=True):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=part.text))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+class PooledChatModel(BaseChatModel):
+    """Chat model that runs each call on one of several clients, scheduled by a KeyPool
+
+    clients[i] must use the pool's key i. A call rate limited by the
+    provider benches that key for the hinted time and moves to the next
+    free key. Server and connection errors are retried after a backoff,
+    since the clients' own retries are off. Streams are only retried if
+    nothing was generated yet.
+    """
+    max_attempts: int = RATE_LIMIT_MAX_ATTEMPTS
+    max_transient_retries: int = TRANSIENT_MAX_RETRIES
+
+    _pool: KeyPool = PrivateAttr()
+    _clients: List[BaseChatModel] = PrivateAttr()
+
+    def __init__(self, pool: KeyPool, clients: List[BaseChatModel], **kwargs):
+        super().__init__(**kwargs)
+        self._pool = pool
+        self._clients = clients
+
+    @property
+    def _llm_type(self) -> str:
+        return "pooled-" + self._clients[0]._llm_type
+
+    def _should_retry(self, state: KeyState, error: Exception, rate_limited: int, transient: int) -> Optional[str]:
+        """Bench or back off after a failed attempt, returning which budget it used, or None to give up"""
+        if is_rate_limited(error) and rate_limited < self.max_attempts - 1:
+            self._pool.block(state, retry_after_seconds(error))
+            return "rate_limited"
+        if is_transient(error) and transient < self.max_transient_retries:
+            count("llm_transient_retries_total")
+            time.sleep(transient_backoff(transient))
+            return "transient"
+        return None
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        tokens = count_tokens(messages_to_text(messages))
+        rate_limited = transient = 0
+        while True:
+            state = self._pool.acquire(tokens)
+            try:
+                result = self._clients[state.index]._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                retry = self._should_retry(state, e, rate_limited, transient)
+                if retry is None:
+                    raise
+                rate_limited += retry == "rate_limited"
+                transient += retry == "transient"
+                continue
+            self._pool.charge(state, sum(count_tokens(generation.text) for generation in result.generations))
+            return result
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens = count_tokens(messages_to_text(messages))
+        rate_limited = transient = 0
+        while True:
+            state = self._pool.acquire(tokens)
+            generated = []
+            try:
+                for chunk in self._clients[state.index]._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    generated.append(chunk.text)
+                    yield chunk
+            except Exception as e:
+                retry = None if generated else self._should_retry(state, e, rate_limited, transient)
+                if retry is None:
+                    raise
+                rate_limited += retry == "rate_limited"
+                transient += retry == "transient"
+                continue
+            self._pool.charge(state, count_tokens("".join(generated)))
+            return
+
+@lru_cache(maxsize=32)
+def get_key_pool(keys: Tuple[str, ...], model_name: str) -> KeyPool:
+    """Return the pool shared by every backend using these keys for this model"""
+    return KeyPool(list(keys), GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE, RATE_LIMIT_MAX_WAIT)
+
+class LLMBackend(ABC):
+    """A configured provider: one reusable chat model plus text helpers
+
+    config is passed through to LangChain, e.g. {"callbacks": [usage]},
+    so per-call callbacks never have to be baked into the shared client.
+    """
+    name = "base"
+    default_model = ""
+    api_key_env: Optional[str] = None
+
+    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None,
+                 temperature: float = 0.3, max_tokens: int = 2048):
+        self.api_key = api_key
+        self.model_name = model_name or self.default_model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.chat_model = self.create_chat_model()
+
+    @classmethod
+    def default_api_key(cls) -> Optional[str]:
+        return os.getenv(cls.api_key_env) if cls.api_key_env else None
+
+    @abstractmethod
+    def create_chat_model(self) -> BaseChatModel:
+        """Build the chat model this backend's calls go through"""
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(text)
+
+    def invoke(self, prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
+        return self.chat_model.invoke(prompt, config=config).content
+
+    def batch(self, prompts: List[str], max_concurrency: Optional[int] = None,
+              config: Optional[Dict[str, Any]] = None) -> List[str]:
+        config = dict(config or {}, max_concurrency=max_concurrency)
+        return [message.content for message in self.chat_model.batch(prompts, config=config)]
+
+    def stream(self, prompt: str, config: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        for chunk in self.chat_model.stream(prompt, config=config):
+            yield chunk.content
+
+class GroqBackend(LLMBackend):
+    """Groq over one or more API keys, given comma separated"""
+    name = "groq"
+    default_model = "llama-3.1-8b-instant"
+    api_key_env = "GROQ_API_KEY"
+
+    @classmethod
+    def default_api_key(cls) -> Optional[str]:
+        return os.getenv("GROQ_API_KEYS") or os.getenv("GROQ_API_KEY")
+
+    def create_chat_model(self) -> BaseChatModel:
+        from langchain_groq import ChatGroq
+
+        keys = tuple(key.strip() for key in self.api_key.split(",") if key.strip())
+        clients = [
+            # The pool retries 429s on another key and backs off on 5xx and connection errors
+            ChatGroq(
+                groq_api_key=key,
+                model_name=self.model_name,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                max_retries=0
+            )
+            for key in keys
+        ]
+        return PooledChatModel(get_key_pool(keys, self.model_name), clients)
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+    default_model = "gemini-pro"
+    api_key_env = "GOOGLE_API_KEY"
+
+    def create_chat_model(self) -> BaseChatModel:
+        return GeminiChatModel(
+            api_key=self.api_key,
+            model_name=self.model_name,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens
+        )
+
+class FakeBackend(LLMBackend):
+    name = "fake"
+    default_model = "local-fake"
+
+    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None,
+                 temperature: float = 0.3, max_tokens: int = 2048, latency: float = FAKE_LLM_LATENCY,
+                 tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND,
+                 failure_rate: float = FAKE_LLM_FAILURE_RATE, seed: int = FAKE_LLM_SEED):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.seed = seed
+        super().__init__(api_key, model_name, temperature, max_tokens)
+
+    def create_chat_model(self) -> BaseChatModel:
+        return LocalChatModel(
+            latency=self.latency,
+            tokens_per_second=self.tokens_per_second,
+            failure_rate=self.failure_rate,
+            seed=self.seed,
+            max_tokens=self.max_tokens
+        )
+
+BACKENDS = {backend.name: backend for backend in (GroqBackend, GeminiBackend, FakeBackend)}
+
+def get_backend(name: Optional[str] = None, api_key: Optional[str] = None, model_name: Optional[str] = None,
+                temperature: float = 0.3, max_tokens: int = 2048) -> LLMBackend:
+    """Return the shared backend for this configuration, building it on first use
+
+    name defaults to LLM_BACKEND and api_key to the backend's environment
+    variable. Raises SummarizerError for an unknown backend or a missing key.
+    """
+    name = name or LLM_BACKEND
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise SummarizerError(f"Unknown LLM backend {name!r}, expected one of {sorted(BACKENDS)}")
+    if backend_class.api_key_env:
+        api_key = api_key or backend_class.default_api_key()
+        if not api_key:
+            raise SummarizerError(f"{backend_class.api_key_env} not found. Please provide a {name.title()} API key.")
+    return build_backend(name, api_key, model_name or LLM_MODEL_NAME, temperature, max_tokens)
+
+@lru_cache(maxsize=32)
+def build_backend(name: str, api_key: Optional[str], model_name: Optional[str],
+                  temperature: float, max_tokens: int) -> LLMBackend:
+    return BACKENDS[name](api_key, model_name, temperature, max_tokens)
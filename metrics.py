@@ -0,0 +1,223 @@
+"""Timing spans and counters for every pipeline stage.
+
+Process-wide totals are kept in a registry that renders the Prometheus
+text format (served by service.py on /metrics). Inside trace_run() the same
+spans and counters are also collected for that one run, which is what the
+UI debug panel shows. With METRICS_LOG set to a file path, or "-" for
+stderr, every finished span is also written as a JSON line.
+
+Executor threads do not inherit the current run; submit work through
+in_current_context() so spans recorded there land in the right trace.
+"""
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Any, Callable, Dict, Iterator, List, Tuple
+
+METRICS_LOG = os.getenv("METRICS_LOG", "")
+METRIC_PREFIX = "summarizer_"
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+def label_set(labels: Dict[str, Any]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and latency histograms"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+        self._gauges: Dict[Tuple[str, LabelSet], float] = {}
+        # name, labels -> [per bucket counts..., sum, count]
+        self._histograms: Dict[Tuple[str, LabelSet], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, label_set(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, label_set(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, label_set(labels))
+        with self._lock:
+            histogram = self._histograms.setdefault(key, [0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every metric as JSON serializable data"""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._gauges.items()
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), "sum": values[-2], "count": values[-1]}
+                    for (name, labels), values in self._histograms.items()
+                ],
+            }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                typed = set()
+                for (name, labels), value in sorted(metrics.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{METRIC_PREFIX}{name}{format_labels(labels)} {value:g}")
+            typed = set()
+            for (name, labels), values in sorted(self._histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                    typed.add(name)
+                for bound, bucket_count in zip(self.buckets, values):
+                    bucket_labels = format_labels(labels + (("le", f"{bound:g}"),))
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{bucket_labels} {bucket_count:g}")
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {values[-1]:g}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{format_labels(labels)} {values[-2]:g}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{format_labels(labels)} {values[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+@dataclass
+class Span:
+    name: str
+    labels: Dict[str, Any]
+    start: float
+    seconds: float
+
+@dataclass
+class RunTrace:
+    """Spans and counters recorded while one pipeline run was active"""
+    started: float = field(default_factory=time.perf_counter)
+    spans: List[Span] = field(default_factory=list)
+    counters: Dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_span(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def add_count(self, name: str, value: float, labels: Dict[str, Any]):
+        key = name + format_labels(label_set(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """Aggregate spans by name and labels, in the order they first started"""
+        rows: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        for span in spans:
+            key = span.name + format_labels(label_set(span.labels))
+            row = rows.setdefault(key, {"span": key, "count": 0, "total_s": 0.0, "max_s": 0.0, "first_at_s": span.start})
+            row["count"] += 1
+            row["total_s"] += span.seconds
+            row["max_s"] = max(row["max_s"], span.seconds)
+        for row in rows.values():
+            for column in ("total_s", "max_s", "first_at_s"):
+                row[column] = round(row[column], 3)
+        return list(rows.values())
+
+_current_trace: contextvars.ContextVar[Optional[RunTrace]] = contextvars.ContextVar("current_trace", default=None)
+_log_lock = threading.Lock()
+
+@contextmanager
+def trace_run() -> Iterator[RunTrace]:
+    """Collect the spans and counters of everything run inside the block"""
+    trace = RunTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def current_trace() -> Optional[RunTrace]:
+    return _current_trace.get()
+
+def in_current_context(fn: Callable) -> Callable:
+    """Bind fn to a copy of the caller's context so it runs on another thread within the same trace
+
+    A context can only be entered by one thread at a time, so wrap fn once per submitted task.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
+
+def log_event(record: Dict[str, Any]):
+    """Write record as a JSON line to METRICS_LOG when it is set"""
+    if not METRICS_LOG:
+        return
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        if METRICS_LOG == "-":
+            print(line, file=sys.stderr)
+        else:
+            with open(METRICS_LOG, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+def count(name: str, value: float = 1, **labels):
+    """Increment a counter globally and in the current run"""
+    REGISTRY.inc(name, value, **labels)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_count(name, value, labels)
+
+@contextmanager
+def span(name: str, **labels):
+    """Time the block, recording it even when the block raises
+
+    labels must not use the key "span", which holds the name in the registry.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, started, time.perf_counter() - started, **labels)
+
+def record_span(name: str, started: float, seconds: float, **labels):
+    """Record a span timed elsewhere, such as in callbacks; started is a time.perf_counter() value"""
+    REGISTRY.observe("span_seconds", seconds, span=name, **labels)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_span(Span(name, labels, started - trace.started, seconds))
+    log_event({"ts": time.time(), "span": name, "seconds": round(seconds, 6), **labels})
+
+def timed(name: str, fn: Callable, **labels) -> Callable:
+    """Wrap fn so every call is recorded as a span"""
+    def run(*args, **kwargs):
+        with span(name, **labels):
+            return fn(*args, **kwargs)
+    return run
@@ -0,0 +1,90 @@
+"""Clean raw caption text before it is chunked and sent to the LLM.
+
+Transcripts arrive either as plain caption lines from youtube-transcript-api
+or as SRT from the pytube fallback. Both carry tokens that cost LLM time
+without adding meaning: SRT indices and timestamps, markup, [Music] style
+markers, filler words and the rolling duplicate lines of auto-generated
+captions.
+"""
+import html
+import re
+from typing import List
+
+SRT_INDEX_PATTERN = re.compile(r'^\d+$')
+TIMESTAMP_PATTERN = re.compile(
+    r'^\d{1,2}:\d{2}(?::\d{2})?[,.]\d{1,3}\s*-->\s*\d{1,2}:\d{2}(?::\d{2})?[,.]\d{1,3}.*$'
+)
+WEBVTT_HEADER_PATTERN = re.compile(r'^(WEBVTT|Kind:|Language:|NOTE\b)')
+MARKUP_PATTERN = re.compile(r'<[^>]+>|\{\\[^}]*\}')
+# [Music], [Applause], (laughter), ♪ ... ♪ and similar sound descriptions
+NOISE_PATTERN = re.compile(r'\[[^\]]{0,40}\]|\((?:music|applause|laughter|laughs|inaudible|silence)\)|♪+', re.IGNORECASE)
+FILLER_PATTERN = re.compile(r'\b(?:u+h+|u+m+|e+r+m+|h+m+|m+h?m+)\b[,.]?\s*', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'[ \t]+')
+
+# Longest word overlap looked for between consecutive caption lines
+MAX_OVERLAP_WORDS = 20
+
+def strip_caption_markup(lines: List[str]) -> List[str]:
+    """Drop SRT/WebVTT indices, timestamps and headers and remove inline markup
+
+    A line holding only a number is an SRT index only when a timestamp
+    follows it; otherwise it is a caption such as "42" and is kept.
+    """
+    lines = [line.strip() for line in lines]
+    cleaned = []
+    for index, line in enumerate(lines):
+        if not line or TIMESTAMP_PATTERN.match(line) or WEBVTT_HEADER_PATTERN.match(line):
+            continue
+        if SRT_INDEX_PATTERN.match(line) and index + 1 < len(lines) and TIMESTAMP_PATTERN.match(lines[index + 1]):
+            continue
+        line = html.unescape(MARKUP_PATTERN.sub('', line))
+        cleaned.append(line)
+    return cleaned
+
+def collapse_noise(line: str) -> str:
+    """Remove sound markers and filler words and squeeze whitespace"""
+    line = NOISE_PATTERN.sub(' ', line)
+    line = FILLER_PATTERN.sub('', line)
+    return WHITESPACE_PATTERN.sub(' ', line).strip()
+
+def overlap_length(previous: List[str], current: List[str]) -> int:
+    """Number of words at the start of current that repeat the end of previous
+
+    Both lists must already be lowercased. A single shared word only counts
+    when it is the whole line, so natural repetitions such as "very, very"
+    across a line break survive.
+    """
+    longest = min(len(previous), len(current), MAX_OVERLAP_WORDS)
+    first = current[0] if current else None
+    for size in range(longest, 0, -1):
+        if size == 1 and len(current) > 1:
+            break
+        # Only sizes whose overlap would start with current's first word are compared in full
+        if previous[-size] == first and previous[-size:] == current[:size]:
+            return size
+    return 0
+
+def deduplicate_lines(lines: List[str]) -> List[str]:
+    """Merge the rolling, overlapping lines of auto-generated captions"""
+    result = []
+    previous_words = []
+    for line in lines:
+        words = line.split()
+        if not words:
+            continue
+        # Lowercase each line once; the overlap search compares many slices of it
+        lowered = [word.lower() for word in words]
+        overlap = overlap_length(previous_words, lowered)
+        remainder = words[overlap:]
+        if remainder:
+            result.append(' '.join(remainder))
+        # Compare the next line against everything recently said, not just the trimmed remainder
+        previous_words = (previous_words + lowered[overlap:])[-MAX_OVERLAP_WORDS:]
+    return result
+
+def normalize_transcript(transcript: str) -> str:
+    """Return the transcript without markup, caption noise and repeated lines"""
+    lines = strip_caption_markup(transcript.splitlines())
+    lines = [collapse_noise(line) for line in lines]
+    lines = deduplicate_lines([line for line in lines if line])
+    return '\n'.join(lines)
@@ -0,0 +1,178 @@
+"""Client-side rate limiting across a pool of provider API keys.
+
+Each key gets a requests-per-minute and a tokens-per-minute token bucket.
+A call is scheduled on the key that can take it soonest, waiting only when
+every key is exhausted, so a batch of map calls spreads over the pool
+instead of running into 429s on one key. Callers waiting for a key are
+served in arrival order, and max_wait only bounds the wait of the caller at
+the front of that queue, so a long queue of map calls slows down instead of
+timing out. When the provider still answers 429, the key is benched until
+the time given in the response's retry hints.
+"""
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, List
+
+from metrics import count
+
+DURATION_PART_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+class RateLimitTimeout(Exception):
+    """Raised when no key frees up within the pool's maximum wait"""
+
+class TokenBucket:
+    """Bucket refilled continuously at capacity per minute
+
+    take() may drive the level below zero, which is how usage learned
+    after a call (the generated tokens) is charged to later calls.
+    """
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken; requests above capacity only wait for a full bucket"""
+        self.refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60.0 / self.capacity)
+
+    def take(self, amount: float, now: float):
+        self.refill(now)
+        self.level -= amount
+
+@dataclass
+class KeyState:
+    index: int
+    key: str
+    requests: TokenBucket
+    tokens: TokenBucket
+    blocked_until: float = 0.0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        return max(
+            self.blocked_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now)
+        )
+
+    def headroom(self) -> float:
+        """Share of the tighter of the two limits still available, as of the last refill"""
+        return min(self.requests.level / self.requests.capacity, self.tokens.level / self.tokens.capacity)
+
+class KeyPool:
+    """Schedule calls over several API keys within their per-minute limits"""
+
+    def __init__(self, keys: List[str], requests_per_minute: float, tokens_per_minute: float, max_wait: float = 120.0):
+        if not keys:
+            raise ValueError("A key pool needs at least one key")
+        self.keys = [
+            KeyState(index, key, TokenBucket(requests_per_minute), TokenBucket(tokens_per_minute))
+            for index, key in enumerate(keys)
+        ]
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        # Tickets hand out the pool in arrival order; only the caller being served waits for a key
+        self._turns = threading.Condition(self._lock)
+        self._next_ticket = 0
+        self._serving = 0
+
+    def acquire(self, tokens: int) -> KeyState:
+        """Reserve one request and tokens on the key that can serve them first, waiting if none can yet
+
+        Among keys that are free right away the one with the most headroom
+        wins, so load spreads evenly instead of draining keys in order.
+        Raises RateLimitTimeout when no key can take the call within
+        max_wait of it reaching the front of the queue.
+        """
+        started = time.monotonic()
+        waited = False
+        with self._turns:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while self._serving != ticket:
+                waited = True
+                self._turns.wait()
+            try:
+                deadline = time.monotonic() + self.max_wait
+                while True:
+                    now = time.monotonic()
+                    state = min(self.keys, key=lambda state: (state.wait_time(tokens, now), -state.headroom()))
+                    wait = state.wait_time(tokens, now)
+                    if wait <= 0:
+                        state.requests.take(1, now)
+                        state.tokens.take(tokens, now)
+                        break
+                    if now + wait > deadline:
+                        raise RateLimitTimeout(f"No API key available within {self.max_wait:g}s")
+                    # Wait in short steps so a key released by another thread is noticed early
+                    waited = True
+                    self._turns.wait(min(wait, 1.0))
+            finally:
+                self._serving += 1
+                self._turns.notify_all()
+        if waited:
+            count("rate_limit_waits_total")
+            count("rate_limit_wait_seconds_total", time.monotonic() - started)
+        return state
+
+    def charge(self, state: KeyState, tokens: int):
+        """Charge tokens known only after the call, such as the generated output"""
+        with self._lock:
+            state.tokens.take(tokens, time.monotonic())
+
+    def block(self, state: KeyState, seconds: float):
+        """Keep a key out of rotation after the provider rate limited it"""
+        with self._lock:
+            state.blocked_until = max(state.blocked_until, time.monotonic() + seconds)
+        count("rate_limited_total", key=state.index)
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse retry hints such as "7.66s", "2m59.56s", "120ms" or plain seconds"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+def retry_after_seconds(error: Exception, default: float = 5.0) -> float:
+    """Seconds to wait after a 429, read from the provider's retry headers when present"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = parse_duration(headers.get("retry-after") or "")
+    if retry_after is not None:
+        return retry_after
+    # Without retry-after, wait for the earliest of the request and token quota resets
+    resets = [
+        parse_duration(headers.get(name) or "")
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return min(resets) if resets else default
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+def is_transient(error: Exception) -> bool:
+    """Server errors and dropped connections, which the provider SDKs would normally retry"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code >= 500
+    # APITimeoutError subclasses APIConnectionError in the Groq and OpenAI SDKs
+    return any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__)
+
+def transient_backoff(retry: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with jitter before the retry-th retry of a transient error"""
+    return min(cap, base * 2 ** retry) * random.uniform(0.75, 1.0)
@@ -0,0 +1,120 @@
+"""Stage and length aware routing of LLM calls.
+
+Every call of the summarization pipeline is routed by its stage (map,
+reduce, final, translate or chapter) and the size of its input to a model,
+an output token cap and a prompt. The first route of the stage whose
+max_input_tokens covers the input wins, so list narrow routes first; every
+stage listed needs a last route without max_input_tokens, and stages a
+policy leaves out keep their default routes.
+
+The default policy caps map calls tightly, since a chunk summary is short
+and a generous max_tokens only lets the model ramble, and keeps the full
+output budget for the final summary and translations. LLM_ROUTES names a
+JSON file replacing it, for example to send the final summary to a larger
+model:
+
+    {"routes": [
+        {"name": "map", "stage": "map", "prompt": "map_brief", "max_tokens": 384},
+        {"name": "reduce", "stage": "reduce", "prompt": "combine", "max_tokens": 1024},
+        {"name": "final-70b", "stage": "final", "prompt": "final", "max_tokens": 2048,
+         "model": "llama-3.3-70b-versatile"},
+        {"name": "translate", "stage": "translate", "prompt": "translate", "max_tokens": 2048}
+     ],
+     "prices": {"llama-3.3-70b-versatile": [0.59, 0.79]}}
+
+A route without a model uses the backend's model. Calls, latency, tokens
+and estimated cost per route are reported by TokenUsage.routes and the
+route_* metrics, so two policies can be compared on the same workload.
+"""
+import json
+import os
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+
+from caches import content_hash
+from errors import SummarizerError
+
+# JSON file with the routing policy, the built-in default when unset
+LLM_ROUTES = os.getenv("LLM_ROUTES", "")
+STAGES = ("map", "reduce", "final", "translate", "chapter")
+
+# USD per million input and output tokens, for the cost estimates
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "gemini-pro": (0.5, 1.5),
+}
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    stage: str
+    prompt: str
+    max_tokens: int
+    model: Optional[str] = None
+    # Largest input in tokens the route takes, any size when None
+    max_input_tokens: Optional[int] = None
+
+    def matches(self, stage: str, input_tokens: int) -> bool:
+        return self.stage == stage and (self.max_input_tokens is None or input_tokens <= self.max_input_tokens)
+
+DEFAULT_ROUTES = (
+    Route("map-short", "map", "map_brief", 256, max_input_tokens=1000),
+    Route("map", "map", "map_brief", 512),
+    Route("reduce", "reduce", "combine", 1024),
+    Route("final", "final", "final", 2048),
+    Route("translate", "translate", "translate", 2048),
+    Route("chapter", "chapter", "chapter", 256),
+)
+
+class RoutingPolicy:
+    """Ordered routes plus the prices used to estimate what they cost"""
+
+    def __init__(self, routes: List[Route], prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        stages = {route.stage for route in routes}
+        unknown = stages - set(STAGES)
+        if unknown:
+            raise SummarizerError(f"Unknown routing stages {sorted(unknown)}, expected some of {list(STAGES)}")
+        for stage in stages:
+            if not any(route.stage == stage and route.max_input_tokens is None for route in routes):
+                raise SummarizerError(f"Routing policy needs a route for {stage} without max_input_tokens")
+        self.routes = list(routes) + [route for route in DEFAULT_ROUTES if route.stage not in stages]
+        self.prices = dict(MODEL_PRICES, **(prices or {}))
+
+    def select(self, stage: str, input_tokens: int) -> Route:
+        """Return the first route of stage that takes an input of this size"""
+        return next(route for route in self.routes if route.matches(stage, input_tokens))
+
+    def widest(self, stage: str) -> Route:
+        """Return the route of stage that takes inputs of any size"""
+        return self.select(stage, 2 ** 62)
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """Estimated USD cost of a call, zero for models without a price"""
+        input_price, output_price = self.prices.get(model, (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def fingerprint(self) -> str:
+        """Identify the routes, so cached results from another policy are not reused"""
+        return content_hash(json.dumps([asdict(route) for route in self.routes], sort_keys=True))
+
+def load_routing_policy(path: str) -> RoutingPolicy:
+    """Read a policy from a JSON file holding a list of routes or {"routes": [...], "prices": {...}}"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {"routes": data}
+        routes = [Route(**route) for route in data["routes"]]
+        prices = {model: tuple(price) for model, price in data.get("prices", {}).items()}
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        raise SummarizerError(f"Invalid routing policy {path}: {str(e)}") from e
+    return RoutingPolicy(routes, prices)
+
+@lru_cache(maxsize=1)
+def get_routing_policy() -> RoutingPolicy:
+    """Return the policy from LLM_ROUTES, or the default one"""
+    if LLM_ROUTES:
+        return load_routing_policy(LLM_ROUTES)
+    return RoutingPolicy(list(DEFAULT_ROUTES))
@@ -0,0 +1,222 @@
+"""Asynchronous HTTP API for the summarizer, run next to the Streamlit UI.
+
+    python service.py --port 8000
+
+    POST /summarize  {"url": "...", "language_code": "en"}
+    POST /translate  {"summary": "...", "target_language": "Spanish"}
+                     or {"summary": "...", "target_languages": ["Spanish", "Hindi"]}
+    GET  /healthz
+    GET  /metrics    Prometheus text format
+
+Identical requests that arrive while one is already running share that
+single pipeline run instead of starting their own; requests only count as
+identical when they carry the same api_key. New work is only
+admitted while fewer than SERVICE_MAX_INFLIGHT pipelines are running;
+beyond that the service answers 429 with a Retry-After header.
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, Hashable
+
+import tornado.web
+
+from caches import content_hash
+from errors import SummarizerError
+from extractive import EXTRACTIVE_METHODS
+from llm_backends import LLM_BACKEND
+from metrics import REGISTRY, count
+from summarizer import summarize_video, translate_summary, translate_summary_many
+from youtube import extract_video_id
+
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "8"))
+SERVICE_MAX_INFLIGHT = int(os.getenv("SERVICE_MAX_INFLIGHT", "16"))
+SERVICE_RETRY_AFTER = int(os.getenv("SERVICE_RETRY_AFTER", "5"))
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Hash of the caller's API key so requests only coalesce onto runs using the same key"""
+    return content_hash(api_key or "")
+
+class Overloaded(Exception):
+    """Raised when a request would start new work while the service is full"""
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one run on a worker pool.
+
+    The first caller for a key starts the work; callers arriving while it
+    runs await the same result. A caller that disconnects does not cancel
+    the shared run.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, max_inflight: int):
+        self.executor = executor
+        self.max_inflight = max_inflight
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            if len(self._inflight) >= self.max_inflight:
+                raise Overloaded()
+            future = asyncio.get_running_loop().run_in_executor(self.executor, fn)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+class JsonHandler(tornado.web.RequestHandler):
+    """Base handler that reads JSON bodies and writes JSON errors"""
+
+    def initialize(self, flights: SingleFlight):
+        self.flights = flights
+
+    def read_json(self) -> Dict[str, Any]:
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except json.JSONDecodeError:
+            raise tornado.web.HTTPError(400, reason="Request body must be JSON")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Request body must be a JSON object")
+        return body
+
+    async def run_coalesced(self, key: Hashable, fn: Callable[[], Any]) -> Optional[Any]:
+        """Run fn through the single-flight group, writing 429/422 responses on failure"""
+        try:
+            return await self.flights.run(key, fn)
+        except Overloaded:
+            self.set_status(429)
+            self.set_header("Retry-After", str(SERVICE_RETRY_AFTER))
+            self.write({"error": "Too many requests in progress, please retry later"})
+        except SummarizerError as e:
+            self.set_status(422)
+            self.write({"error": str(e)})
+        return None
+
+    def write_error(self, status_code: int, **kwargs):
+        self.write({"error": self._reason})
+
+    def on_finish(self):
+        count("http_requests_total", path=self.request.path, status=self.get_status())
+
+class SummarizeHandler(JsonHandler):
+    async def post(self):
+        body = self.read_json()
+        url = body.get("url")
+        video_id = extract_video_id(url) if isinstance(url, str) else None
+        if not video_id:
+            raise tornado.web.HTTPError(400, reason="A valid YouTube url is required")
+        language_code = body.get("language_code", "en")
+        extractive_ratio = body.get("extractive_ratio")
+        if extractive_ratio is not None and (
+            not isinstance(extractive_ratio, (int, float)) or not 0 < extractive_ratio < 1
+        ):
+            raise tornado.web.HTTPError(400, reason="extractive_ratio must be a number between 0 and 1")
+        extractive_method = body.get("extractive_method", "textrank")
+        if extractive_method not in EXTRACTIVE_METHODS:
+            raise tornado.web.HTTPError(400, reason=f"extractive_method must be one of {EXTRACTIVE_METHODS}")
+
+        key = (
+            "summary", video_id, language_code, LLM_BACKEND, extractive_ratio, extractive_method,
+            key_fingerprint(body.get("api_key"))
+        )
+        summary = await self.run_coalesced(key, lambda: summarize_video(
+            url,
+            language_code,
+            api_key=body.get("api_key"),
+            extractive_ratio=extractive_ratio,
+            extractive_method=extractive_method
+        ))
+        if summary is not None:
+            self.write({"video_id": video_id, "summary": summary})
+
+class TranslateHandler(JsonHandler):
+    async def post(self):
+        body = self.read_json()
+        summary = body.get("summary")
+        if not isinstance(summary, str) or not summary:
+            raise tornado.web.HTTPError(400, reason="summary is required")
+        target_languages = body.get("target_languages")
+        if target_languages is not None:
+            await self.translate_many(summary, target_languages, body.get("api_key"))
+            return
+        target_language = body.get("target_language")
+        if not isinstance(target_language, str):
+            raise tornado.web.HTTPError(400, reason="target_language or target_languages is required")
+
+        key = ("translation", content_hash(summary), target_language, LLM_BACKEND, key_fingerprint(body.get("api_key")))
+        translation = await self.run_coalesced(key, lambda: translate_summary(
+            summary,
+            target_language,
+            api_key=body.get("api_key")
+        ))
+        if translation is not None:
+            self.write({"target_language": target_language, "translation": translation})
+
+    async def translate_many(self, summary: str, target_languages: Any, api_key: Optional[str]):
+        if (
+            not isinstance(target_languages, list) or not target_languages
+            or not all(isinstance(language, str) for language in target_languages)
+        ):
+            raise tornado.web.HTTPError(400, reason="target_languages must be a non-empty list of strings")
+        def translate():
+            # Notices travel with the result so coalesced callers all receive them
+            notices = []
+            translations = translate_summary_many(summary, target_languages, api_key=api_key, on_notice=notices.append)
+            return {"translations": translations, "notices": notices}
+
+        key = ("translations", content_hash(summary), tuple(target_languages), LLM_BACKEND, key_fingerprint(api_key))
+        result = await self.run_coalesced(key, translate)
+        if result is not None:
+            self.write(result)
+
+class HealthHandler(JsonHandler):
+    def get(self):
+        self.write({
+            "status": "ok",
+            "inflight": self.flights.inflight,
+            "max_inflight": self.flights.max_inflight,
+            "coalesced": self.flights.coalesced
+        })
+
+class MetricsHandler(JsonHandler):
+    def get(self):
+        REGISTRY.set_gauge("service_inflight", self.flights.inflight)
+        REGISTRY.set_gauge("service_coalesced", self.flights.coalesced)
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.write(REGISTRY.render_prometheus())
+
+def make_app(workers: int = SERVICE_WORKERS, max_inflight: int = SERVICE_MAX_INFLIGHT) -> tornado.web.Application:
+    flights = SingleFlight(ThreadPoolExecutor(max_workers=workers), max_inflight)
+    return tornado.web.Application([
+        (r"/summarize", SummarizeHandler, {"flights": flights}),
+        (r"/translate", TranslateHandler, {"flights": flights}),
+        (r"/healthz", HealthHandler, {"flights": flights}),
+        (r"/metrics", MetricsHandler, {"flights": flights}),
+    ])
+
+async def serve(host: str, port: int, workers: int, max_inflight: int):
+    app = make_app(workers, max_inflight)
+    app.listen(port, address=host)
+    print(f"Summarizer service listening on http://{host}:{port}")
+    await asyncio.Event().wait()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the summarizer HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="threads running pipelines")
+    parser.add_argument("--max-inflight", type=int, default=SERVICE_MAX_INFLIGHT,
+                        help="distinct pipelines admitted at once before answering 429")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.workers, args.max_inflight))
+
+if __name__ == "__main__":
+    main()
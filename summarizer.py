@@ -0,0 +1,779 @@
+"""Summarization library behind the Streamlit app and the batch CLI.
+
+Nothing in here touches Streamlit: failures raise SummarizerError and
+progress is reported through optional callbacks.
+"""
+import os
+import random
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Callable
+from dotenv import load_dotenv
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.callbacks import BaseCallbackHandler
+
+from caches import ResultCache, content_hash, get_result_cache
+from chapters import Chapter, parse_chapter_summary, window_segments
+from errors import SummarizerError
+from extractive import compress_transcript
+from llm_backends import GroqBackend, LLMBackend, count_tokens, get_backend
+from metrics import count, in_current_context, record_span, span
+from normalize import normalize_transcript
+from routing import Route, RoutingPolicy, get_routing_policy
+from youtube import extract_video_id, get_video_segments, get_video_transcript, probe_video
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Model and chunking settings
+LLM_MAX_TOKENS = 2048
+LLM_TEMPERATURE = 0.3
+# Bump whenever a summary or translation prompt changes so cached results are not reused
+PROMPT_VERSION = "3"
+MODEL_CONTEXT_TOKENS = {
+    "llama-3.1-8b-instant": 131072,
+    "gemini-pro": 30720,
+}
+PROMPT_OVERHEAD_TOKENS = 200
+# Groq rate limits requests by tokens per minute, so chunks stay well below the context size
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "4000"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+def get_chunk_token_size(model_name: str = GroqBackend.default_model, max_tokens: int = LLM_MAX_TOKENS) -> int:
+    """Size transcript chunks to what the model can take next to the prompt and its output"""
+    context = MODEL_CONTEXT_TOKENS.get(model_name, 8192)
+    return max(256, min(CHUNK_MAX_TOKENS, context - max_tokens - PROMPT_OVERHEAD_TOKENS))
+
+def split_transcript(transcript: str, model_name: str = GroqBackend.default_model, max_tokens: int = LLM_MAX_TOKENS) -> List[str]:
+    """Split a transcript into token sized chunks, preferring sentence and caption boundaries"""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=get_chunk_token_size(model_name, max_tokens),
+        chunk_overlap=CHUNK_OVERLAP_TOKENS,
+        length_function=count_tokens,
+        separators=["\n\n", ". ", "? ", "! ", "\n", " ", ""]
+    )
+    return text_splitter.split_text(transcript)
+
+# Map phase settings
+MAP_CONCURRENCY = int(os.getenv("MAP_CONCURRENCY", "4"))
+MAP_MAX_RETRIES = int(os.getenv("MAP_MAX_RETRIES", "2"))
+
+def invoke_with_retry(chain, inputs: Dict[str, Any], max_retries: int = MAP_MAX_RETRIES,
+                      config: Optional[Dict[str, Any]] = None, stage: str = "map") -> str:
+    """Invoke a chain, retrying with jittered exponential backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            return chain.invoke(inputs, config=config)['text']
+        except Exception:
+            if attempt == max_retries:
+                raise
+            count("llm_retries_total", stage=stage)
+            time.sleep((2 ** attempt) + random.uniform(0, 1))
+
+def summarize_chunks(chain, texts: List[str], max_workers: int = MAP_CONCURRENCY, max_retries: int = MAP_MAX_RETRIES,
+                     on_progress: Optional[Callable[[int, int], None]] = None,
+                     config: Optional[Dict[str, Any]] = None, stage: str = "map",
+                     on_result: Optional[Callable[[int, Optional[str]], None]] = None) -> List[Optional[str]]:
+    """Summarize texts concurrently, keeping their order.
+
+    A text that still fails after its retries yields None instead of
+    aborting the others. on_progress(done, total) and on_result(index,
+    summary) are called from the caller's thread as texts finish, so they
+    may safely update the UI.
+    chain may be a StageRouter, which then picks the chain and config for
+    each text and memoizes the results, so texts done by an earlier run
+    are not sent again. Each text sent is timed as an llm_call span
+    labelled with stage.
+    """
+    def summarize_chunk(text):
+        text_chain, text_config, labels, memo_key = chain, config, {"stage": stage}, None
+        if isinstance(chain, StageRouter):
+            route = chain.select(text)
+            memo_key = chain.memo_key(route, text)
+            memoized = chain.recall(memo_key)
+            if memoized is not None:
+                return memoized
+            text_chain, text_config, labels["route"] = chain.llm_chain(route), chain.config(route), route.name
+        try:
+            with span("llm_call", **labels):
+                result = invoke_with_retry(text_chain, {"text": text}, max_retries, text_config, stage)
+        except Exception:
+            count("chunk_failures_total", stage=stage)
+            return None
+        if memo_key is not None:
+            chain.remember(memo_key, result)
+        return result
+
+    summaries = [None] * len(texts)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(in_current_context(summarize_chunk), text): index
+            for index, text in enumerate(texts)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            summaries[index] = future.result()
+            if on_result:
+                on_result(index, summaries[index])
+            if on_progress:
+                on_progress(done, len(texts))
+    return summaries
+
+# Reduce phase settings
+REDUCE_TOKEN_BUDGET = int(os.getenv("REDUCE_TOKEN_BUDGET", "6000"))
+REDUCE_MAX_LEVELS = int(os.getenv("REDUCE_MAX_LEVELS", "6"))
+
+class TokenUsage(BaseCallbackHandler):
+    """LangChain callback that tallies LLM calls and the tokens sent and received
+
+    cached is set when the whole result was served from the result cache
+    instead, and cache_hits counts the results that were. The transcript
+    and extractive fields record what the local cleanup and compression
+    stages saved. Calls and tokens are also added to the process-wide
+    metrics.
+
+    Calls whose config metadata names a route (see StageRouter) are also
+    tallied per route in routes, with their latency and estimated cost.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        # route name -> model, calls, errors, seconds, input_tokens, output_tokens, cost_usd
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self._route_calls: Dict[Any, tuple] = {}
+        self.cached = False
+        self.cache_hits = 0
+        self.transcript_tokens = 0
+        self.transcript_tokens_removed = 0
+        self.extractive_tokens_removed = 0
+        self._lock = threading.Lock()
+
+    def record_cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+            self.cached = True
+
+    def on_chat_model_start(self, serialized, messages, run_id=None, metadata=None, **kwargs):
+        tokens = sum(count_tokens(str(message.content)) for batch in messages for message in batch)
+        self.record_call(tokens, run_id, metadata)
+
+    def on_llm_start(self, serialized, prompts, run_id=None, metadata=None, **kwargs):
+        tokens = sum(count_tokens(prompt) for prompt in prompts)
+        self.record_call(tokens, run_id, metadata)
+
+    def record_call(self, input_tokens: int, run_id=None, metadata: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            if metadata and "route" in metadata:
+                self._route_calls[run_id] = (metadata["route"], metadata.get("model", ""), input_tokens, time.perf_counter())
+        count("llm_calls_total")
+        count("llm_tokens_total", input_tokens, direction="input")
+
+    def on_llm_end(self, response, run_id=None, **kwargs):
+        tokens = sum(count_tokens(generation.text) for batch in response.generations for generation in batch)
+        with self._lock:
+            self.output_tokens += tokens
+        count("llm_tokens_total", tokens, direction="output")
+        self.record_route(run_id, tokens)
+
+    def on_llm_error(self, error, run_id=None, **kwargs):
+        self.record_route(run_id, 0, failed=True)
+
+    def record_route(self, run_id, output_tokens: int, failed: bool = False):
+        with self._lock:
+            call = self._route_calls.pop(run_id, None)
+        if call is None:
+            return
+        route, model, input_tokens, started = call
+        seconds = time.perf_counter() - started
+        cost = get_routing_policy().cost(model, input_tokens, output_tokens)
+        with self._lock:
+            stats = self.routes.setdefault(route, {
+                "model": model, "calls": 0, "errors": 0, "seconds": 0.0,
+                "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0
+            })
+            stats["calls"] += 1
+            stats["errors"] += int(failed)
+            stats["seconds"] += seconds
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            stats["cost_usd"] += cost
+            self.cost_usd += cost
+        record_span("llm_route", started, seconds, route=route, model=model)
+        count("route_tokens_total", input_tokens, route=route, direction="input")
+        count("route_tokens_total", output_tokens, route=route, direction="output")
+        count("route_cost_usd_total", cost, route=route)
+        if failed:
+            count("route_errors_total", route=route)
+
+@dataclass
+class PipelineState:
+    """Resumable progress of summarize_video, kept by the caller across attempts
+
+    Every map and reduce output is stored in results as soon as it is
+    generated, keyed by its input text, route model, output cap and prompt
+    text (see StageRouter.memo_key), and also written to the shared result
+    cache. Passing the same state to a new run, for instance from
+    st.session_state after a Streamlit rerun, re-sends only the chunks that
+    failed or never ran, and a changed final or reduce prompt still reuses
+    every chunk summary. The state is reset when it is used for another video.
+    """
+    video_id: Optional[str] = None
+    results: Dict[str, str] = field(default_factory=dict)
+    chunks: int = 0
+    failed_chunks: int = 0
+    # Outputs taken from results or the result cache in the latest run
+    reused: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def start(self, video_id: str):
+        with self._lock:
+            if video_id != self.video_id:
+                self.video_id = video_id
+                self.results = {}
+            self.chunks = self.failed_chunks = self.reused = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self.results.get(key)
+
+    def put(self, key: str, value: str, reused: bool = False):
+        with self._lock:
+            self.results[key] = value
+            self.reused += int(reused)
+
+def group_by_token_budget(texts: List[str], budget: int) -> List[List[str]]:
+    """Split texts into consecutive groups whose combined size stays within budget"""
+    groups = []
+    current, current_tokens = [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and current_tokens + tokens > budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+def reduce_summaries(chain, summaries: List[str], budget: int = REDUCE_TOKEN_BUDGET,
+                     max_levels: int = REDUCE_MAX_LEVELS,
+                     on_progress: Optional[Callable[[int, int], None]] = None,
+                     config: Optional[Dict[str, Any]] = None) -> str:
+    """Reduce partial summaries level by level until they fit in one prompt.
+
+    Each level groups neighbouring summaries under the token budget and
+    condenses the groups in parallel, so a transcript of N chunks needs
+    O(log N) reduce rounds. Returns the combined text for the final prompt.
+    """
+    level = 0
+    while len(summaries) > 1 and count_tokens("\n\n".join(summaries)) > budget and level < max_levels:
+        groups = group_by_token_budget(summaries, budget)
+        reduced = summarize_chunks(
+            chain, ["\n\n".join(group) for group in groups], on_progress=on_progress, config=config, stage="reduce"
+        )
+        # Keep the raw group text when a group fails so nothing is lost
+        summaries = [
+            summary if summary else "\n\n".join(group)
+            for summary, group in zip(reduced, groups)
+        ]
+        level += 1
+    return "\n\n".join(summaries)
+
+def stream_chain(chain, inputs: Dict[str, Any], on_token: Optional[Callable[[str], None]] = None,
+                 config: Optional[Dict[str, Any]] = None) -> str:
+    """Run an LCEL chain, passing each generated token to on_token when given"""
+    if on_token is None:
+        return chain.invoke(inputs, config=config)
+    tokens = []
+    for token in chain.stream(inputs, config=config):
+        tokens.append(token)
+        on_token(token)
+    return "".join(tokens)
+
+def get_llm_backend(backend: Optional[str] = None, api_key: Optional[str] = None, model_name: Optional[str] = None,
+                    max_tokens: int = LLM_MAX_TOKENS) -> LLMBackend:
+    """Return the shared backend the pipeline runs on, LLM_BACKEND unless one is named"""
+    return get_backend(backend, api_key, model_name, temperature=LLM_TEMPERATURE, max_tokens=max_tokens)
+
+# Prompt templates by name, as referenced by the routes in routing.py
+PROMPTS = {
+    "map": """Please provide a comprehensive summary of the following text. 
+        Focus on the main points and key details while maintaining the original context and meaning:
+
+        {text}
+
+        SUMMARY:""",
+    "map_brief": """Summarize the following part of a video transcript in a few concise bullet points.
+        Keep the main points and key details such as names and numbers, and leave out repetition:
+
+        {text}
+
+        SUMMARY:""",
+    "combine": """Please combine the following partial summaries into one concise summary.
+            Keep every key point and the order in which they appear:
+
+            {text}
+
+            COMBINED SUMMARY:""",
+    "final": """Please provide a final, concise summary combining all these points:
+
+            {text}
+
+            FINAL SUMMARY:""",
+    "translate": """Please translate the following text to {target_language}. 
+        Maintain the same format and structure while ensuring accurate translation:
+
+        {text}
+
+        TRANSLATION:""",
+    "chapter": """Write a short title and a summary of two or three sentences for the following part of a video transcript.
+        Answer in exactly this format:
+        TITLE: <title>
+        SUMMARY: <summary>
+
+        {text}""",
+}
+
+def get_prompt(name: str) -> PromptTemplate:
+    if name not in PROMPTS:
+        raise SummarizerError(f"Unknown prompt {name!r} in routing policy, expected one of {sorted(PROMPTS)}")
+    return PromptTemplate.from_template(PROMPTS[name])
+
+class StageRouter:
+    """The chains of one pipeline stage, one per route, picked per input by its size
+
+    Chains are built on first use and shared by every text of the stage.
+    The config of each call names its route and model so usage can report
+    per route. Extra keyword arguments fill prompt variables other than text.
+
+    Outputs are memoized in state, when given, and in the result cache, so
+    recall and remember let a rerun skip texts that were already done.
+    """
+
+    def __init__(self, stage: str, backend: Optional[str] = None, api_key: Optional[str] = None,
+                 usage: Optional[TokenUsage] = None, policy: Optional[RoutingPolicy] = None,
+                 state: Optional[PipelineState] = None, **prompt_variables):
+        self.stage = stage
+        self.backend = backend
+        self.api_key = api_key
+        self.usage = usage
+        self.policy = policy or get_routing_policy()
+        self.state = state
+        self.prompt_variables = prompt_variables
+        self._chains: Dict[str, LLMChain] = {}
+        self._lock = threading.Lock()
+
+    def select(self, text: str) -> Route:
+        return self.policy.select(self.stage, count_tokens(text))
+
+    def backend_for(self, route: Route) -> LLMBackend:
+        return get_llm_backend(self.backend, self.api_key, route.model, route.max_tokens)
+
+    def prompt(self, route: Route) -> PromptTemplate:
+        return get_prompt(route.prompt).partial(**self.prompt_variables)
+
+    def config(self, route: Route) -> Dict[str, Any]:
+        config = {"metadata": {"route": route.name, "model": self.backend_for(route).model_name}}
+        if self.usage:
+            config["callbacks"] = [self.usage]
+        return config
+
+    def llm_chain(self, route: Route) -> LLMChain:
+        with self._lock:
+            if route.name not in self._chains:
+                self._chains[route.name] = LLMChain(llm=self.backend_for(route).chat_model, prompt=self.prompt(route))
+            return self._chains[route.name]
+
+    def streaming_chain(self, route: Route):
+        return self.prompt(route) | self.backend_for(route).chat_model | StrOutputParser()
+
+    def memo_key(self, route: Route, text: str) -> str:
+        """Identify the output for text by what determines it, so unrelated prompt or route edits keep it valid"""
+        llm_backend = self.backend_for(route)
+        return ResultCache.make_key(
+            "chunk", content_hash(text), llm_backend.name, llm_backend.model_name, route.max_tokens, LLM_TEMPERATURE,
+            content_hash(get_prompt(route.prompt).template), sorted(self.prompt_variables.items())
+        )
+
+    def recall(self, key: str) -> Optional[str]:
+        value = self.state.get(key) if self.state else None
+        if value is None:
+            value = get_result_cache().get(key)
+        count("cache_requests_total", cache="chunk", result="hit" if value is not None else "miss")
+        if value is not None and self.state:
+            self.state.put(key, value, reused=True)
+        return value
+
+    def remember(self, key: str, value: str):
+        if self.state:
+            self.state.put(key, value)
+        get_result_cache().set(key, value)
+
+def resolve_language(video_id: str, language_code: str, on_notice: Optional[Callable[[str], None]] = None) -> str:
+    """Return language_code when the video has captions in it, otherwise its first caption language"""
+    # Get available languages from the pre-flight probe
+    available_languages = probe_video(video_id).caption_tracks
+    if not available_languages:
+        raise SummarizerError("Could not retrieve available languages for this video")
+
+    # If requested language is not available, use the first available language
+    if not any(lang['code'] == language_code for lang in available_languages):
+        language_code = available_languages[0]['code']
+        count("language_fallback_total")
+        if on_notice:
+            on_notice(f"Requested language not available. Using {available_languages[0]['name']} instead.")
+    return language_code
+
+def summarize_video(url, language_code='en', on_progress: Optional[Callable[[str, int, int], None]] = None,
+                    on_token: Optional[Callable[[str], None]] = None, usage: Optional[TokenUsage] = None,
+                    api_key: Optional[str] = None, on_notice: Optional[Callable[[str], None]] = None,
+                    extractive_ratio: Optional[float] = None, extractive_method: str = "textrank",
+                    backend: Optional[str] = None, state: Optional[PipelineState] = None) -> str:
+    """Summarize YouTube video content with the configured LLM backend
+
+    on_progress(stage, done, total) reports map and reduce progress,
+    on_token receives the final summary as it is generated, usage, when
+    given, tallies the LLM calls and tokens spent and on_notice receives
+    non-fatal messages for the user. With extractive_ratio between 0 and 1
+    the transcript is first cut down locally to that share of its tokens.
+    backend names an LLM backend other than LLM_BACKEND. Each call's
+    model, output cap and prompt come from the routing policy. Pass the
+    state of an earlier attempt to resume it, reusing every chunk summary
+    it finished. Raises SummarizerError on failure.
+    """
+    llm_backend = get_llm_backend(backend, api_key)
+    policy = get_routing_policy()
+    # Always count usage so the process-wide token metrics see every call
+    usage = usage if usage is not None else TokenUsage()
+
+    # Extract video ID
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise SummarizerError("Invalid YouTube URL")
+
+    language_code = resolve_language(video_id, language_code, on_notice)
+
+    # Get video transcript and strip caption noise before anything is sent to the LLM
+    raw_transcript = get_video_transcript(url, language_code)
+    with span("normalize"):
+        transcript = normalize_transcript(raw_transcript)
+    if not transcript:
+        raise SummarizerError("Transcript is empty after removing caption markup")
+    raw_tokens = count_tokens(raw_transcript)
+    normalized_tokens = count_tokens(transcript)
+    usage.transcript_tokens = normalized_tokens
+    usage.transcript_tokens_removed = raw_tokens - normalized_tokens
+
+    # Optionally keep only the most informative sentences before the map stage
+    if extractive_ratio is not None and 0 < extractive_ratio < 1:
+        with span("extractive", method=extractive_method):
+            transcript = compress_transcript(
+                transcript,
+                ratio=extractive_ratio,
+                method=extractive_method,
+                count_tokens=count_tokens
+            )
+        usage.extractive_tokens_removed = normalized_tokens - count_tokens(transcript)
+
+    # Identical transcript, model, prompts and routes give the same summary
+    result_cache = get_result_cache()
+    cache_key = ResultCache.make_key(
+        "summary", content_hash(transcript), llm_backend.name, llm_backend.model_name, LLM_TEMPERATURE, PROMPT_VERSION,
+        policy.fingerprint()
+    )
+    cached_summary = result_cache.get(cache_key)
+    count("cache_requests_total", cache="summary", result="hit" if cached_summary is not None else "miss")
+    if cached_summary is not None:
+        usage.record_cache_hit()
+        return cached_summary
+
+    # Split transcript into chunks that fit the map route taking inputs of any size
+    map_route = policy.widest("map")
+    with span("split"):
+        chunks = split_transcript(transcript, map_route.model or llm_backend.model_name, map_route.max_tokens)
+
+    state = state if state is not None else PipelineState()
+    state.start(video_id)
+    state.chunks = len(chunks)
+
+    def router(stage):
+        return StageRouter(stage, backend, api_key, usage, policy, state)
+
+    # Generate summary
+    try:
+        def report(stage):
+            if on_progress is None:
+                return None
+            return lambda done, total: on_progress(stage, done, total)
+
+        # Process chunks concurrently and combine summaries in order
+        with span("map"):
+            chunk_summaries = summarize_chunks(router("map"), chunks, on_progress=report("Chunk"))
+        summaries = [summary for summary in chunk_summaries if summary]
+        failed = len(chunk_summaries) - len(summaries)
+        state.failed_chunks = failed
+        if not summaries:
+            raise SummarizerError("every transcript chunk failed")
+        if state.reused and on_notice:
+            on_notice(f"Reused {state.reused} of {len(chunks)} chunk summaries from an earlier run.")
+        if failed and on_notice:
+            on_notice(f"{failed} of {len(chunk_summaries)} transcript chunks could not be summarized and were skipped. "
+                      "Summarizing again only retries those.")
+
+        # Condense the chunk summaries until they fit in a single final prompt
+        with span("reduce"):
+            combined_text = reduce_summaries(router("reduce"), summaries, on_progress=report("Reduce group"))
+
+        # Create final summary
+        final_router = router("final")
+        final_route = final_router.select(combined_text)
+        with span("final"):
+            summary = stream_chain(
+                final_router.streaming_chain(final_route), {"text": combined_text}, on_token, final_router.config(final_route)
+            )
+        if not failed:
+            result_cache.set(cache_key, summary)
+        return summary
+    except Exception as e:
+        raise SummarizerError(f"Error generating summary: {str(e)}") from e
+
+def summarize_chapters(url, language_code='en', on_chapter: Optional[Callable[[Chapter], None]] = None,
+                       on_progress: Optional[Callable[[str, int, int], None]] = None,
+                       usage: Optional[TokenUsage] = None, api_key: Optional[str] = None,
+                       on_notice: Optional[Callable[[str], None]] = None, backend: Optional[str] = None,
+                       state: Optional[PipelineState] = None) -> List[Chapter]:
+    """Summarize a video as timestamped chapters, each as soon as it is ready
+
+    The timed captions are windowed into chapters at natural breaks (see
+    chapters.py) that are summarized concurrently, with no reduce or final
+    call. on_chapter(chapter) receives every summarized chapter as it
+    finishes, in completion order, and the chapters are returned in video
+    order; chapters that failed have no summary. The other arguments work
+    as for summarize_video. Raises SummarizerError on failure.
+    """
+    get_llm_backend(backend, api_key)
+    policy = get_routing_policy()
+    usage = usage if usage is not None else TokenUsage()
+
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise SummarizerError("Invalid YouTube URL")
+    language_code = resolve_language(video_id, language_code, on_notice)
+    segments = get_video_segments(url, language_code)
+
+    with span("chapters"):
+        chapters = window_segments(segments)
+        for chapter in chapters:
+            chapter.text = normalize_transcript(chapter.text)
+        chapters = [chapter for chapter in chapters if chapter.text]
+    if not chapters:
+        raise SummarizerError("Transcript is empty after removing caption markup")
+    usage.transcript_tokens = sum(count_tokens(chapter.text) for chapter in chapters)
+
+    state = state if state is not None else PipelineState()
+    state.start(video_id)
+    state.chunks = len(chapters)
+
+    def chapter_done(index, result):
+        chapter = chapters[index]
+        if result:
+            chapter.title, chapter.summary = parse_chapter_summary(result)
+            if on_chapter:
+                on_chapter(chapter)
+
+    report = (lambda done, total: on_progress("Chapter", done, total)) if on_progress else None
+    try:
+        with span("map"):
+            results = summarize_chunks(
+                StageRouter("chapter", backend, api_key, usage, policy, state),
+                [chapter.text for chapter in chapters],
+                on_progress=report,
+                stage="chapter",
+                on_result=chapter_done
+            )
+    except Exception as e:
+        raise SummarizerError(f"Error generating summary: {str(e)}") from e
+
+    failed = sum(1 for result in results if not result)
+    state.failed_chunks = failed
+    if failed == len(chapters):
+        raise SummarizerError("Error generating summary: every chapter failed")
+    if state.reused and on_notice:
+        on_notice(f"Reused {state.reused} of {len(chapters)} chapter summaries from an earlier run.")
+    if failed and on_notice:
+        on_notice(f"{failed} of {len(chapters)} chapters could not be summarized and were skipped. "
+                  "Summarizing again only retries those.")
+    return chapters
+
+# Translation settings
+# Longer summaries are translated in paragraph aligned segments of at most this many tokens,
+# leaving room under LLM_MAX_TOKENS for scripts that need more tokens than English
+TRANSLATION_SEGMENT_TOKENS = int(os.getenv("TRANSLATION_SEGMENT_TOKENS", str(LLM_MAX_TOKENS // 2)))
+# Target languages translated at once by translate_summary_many
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+
+def split_for_translation(text: str, max_tokens: int = TRANSLATION_SEGMENT_TOKENS) -> List[str]:
+    """Split text into segments of whole paragraphs that each fit in max_tokens
+
+    A single paragraph longer than max_tokens is cut at line and sentence
+    boundaries. Joining the segments with blank lines restores the text.
+    """
+    paragraphs = []
+    for paragraph in text.split("\n\n"):
+        if count_tokens(paragraph) <= max_tokens:
+            paragraphs.append(paragraph)
+            continue
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max_tokens,
+            chunk_overlap=0,
+            length_function=count_tokens,
+            separators=["\n", ". ", "? ", "! ", " ", ""]
+        )
+        paragraphs.extend(splitter.split_text(paragraph))
+    return ["\n\n".join(group) for group in group_by_token_budget(paragraphs, max_tokens)]
+
+def translate_summary(summary, target_language='en', on_token: Optional[Callable[[str], None]] = None,
+                      usage: Optional[TokenUsage] = None, api_key: Optional[str] = None,
+                      backend: Optional[str] = None) -> str:
+    """Translate summary to target language, streaming tokens to on_token when given
+
+    Summaries longer than TRANSLATION_SEGMENT_TOKENS are split into
+    paragraph aligned segments that are translated in parallel and joined
+    in order; on_token then receives the whole translation at once.
+    Raises SummarizerError on failure.
+    """
+    llm_backend = get_llm_backend(backend, api_key)
+    policy = get_routing_policy()
+    usage = usage if usage is not None else TokenUsage()
+    result_cache = get_result_cache()
+    cache_key = ResultCache.make_key(
+        "translation", content_hash(summary), target_language, llm_backend.name, llm_backend.model_name,
+        LLM_TEMPERATURE, PROMPT_VERSION, policy.fingerprint()
+    )
+    cached_translation = result_cache.get(cache_key)
+    count("cache_requests_total", cache="translation", result="hit" if cached_translation is not None else "miss")
+    if cached_translation is not None:
+        usage.record_cache_hit()
+        return cached_translation
+
+    router = StageRouter("translate", backend, api_key, usage, policy, target_language=target_language)
+    segments = split_for_translation(summary)
+    try:
+        with span("translate"):
+            if len(segments) == 1:
+                route = router.select(summary)
+                translation = stream_chain(
+                    router.streaming_chain(route), {"text": summary}, on_token, router.config(route)
+                )
+            else:
+                translated = summarize_chunks(router, segments, stage="translate")
+                failed = sum(1 for segment in translated if segment is None)
+                if failed:
+                    raise SummarizerError(f"{failed} of {len(segments)} summary segments could not be translated")
+                translation = "\n\n".join(segment.strip() for segment in translated)
+                if on_token:
+                    on_token(translation)
+        result_cache.set(cache_key, translation)
+        return translation
+    except SummarizerError:
+        raise
+    except Exception as e:
+        raise SummarizerError(f"Error translating summary: {str(e)}") from e
+
+def translate_summary_many(summary, target_languages: List[str],
+                           on_progress: Optional[Callable[[str, int, int], None]] = None,
+                           usage: Optional[TokenUsage] = None, api_key: Optional[str] = None,
+                           backend: Optional[str] = None, on_notice: Optional[Callable[[str], None]] = None,
+                           max_workers: int = TRANSLATION_CONCURRENCY) -> Dict[str, str]:
+    """Translate summary into several languages concurrently
+
+    Returns the translations keyed by language in the requested order.
+    on_progress(stage, done, total) is called as languages finish and a
+    language that fails is reported through on_notice and left out.
+    Raises SummarizerError when every language fails.
+    """
+    target_languages = list(dict.fromkeys(target_languages))
+    if not target_languages:
+        raise SummarizerError("No target language selected")
+    usage = usage if usage is not None else TokenUsage()
+    cache_hits = usage.cache_hits
+
+    def translate(language):
+        return translate_summary(summary, language, usage=usage, api_key=api_key, backend=backend)
+
+    translations, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(in_current_context(translate), language): language
+            for language in target_languages
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            language = futures[future]
+            try:
+                translations[language] = future.result()
+            except SummarizerError as e:
+                errors[language] = str(e)
+            if on_progress:
+                on_progress("Language", done, len(target_languages))
+
+    # Languages share usage, so it only counts as cached when none of them called the LLM
+    usage.cached = usage.cache_hits - cache_hits == len(target_languages)
+    if not translations:
+        raise SummarizerError("; ".join(f"{language}: {error}" for language, error in errors.items()))
+    if on_notice:
+        for language, error in errors.items():
+            on_notice(f"{language} translation failed: {error}")
+    return {language: translations[language] for language in target_languages if language in translations}
+
+def summarize_content(content: str, backend: Optional[str] = None, api_key: Optional[str] = None) -> str:
+    """
+    Summarize the content in bullet points with the configured LLM backend
+    """
+    llm = get_llm_backend(backend, api_key).chat_model
+    try:
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are a helpful assistant that summarizes content concisely."),
+            ("user", "Please summarize the following content in bullet points:\n\n{content}")
+        ])
+        
+        chain = prompt | llm | StrOutputParser()
+        return chain.invoke({"content": content})
+    except Exception as e:
+        raise SummarizerError(f"Error summarizing content: {str(e)}") from e
+
+def generate_summary(transcript: str, api_key: Optional[str] = None) -> str:
+    """Generate summary using Google's Gemini Pro model"""
+    gemini = get_llm_backend("gemini", api_key)
+    try:
+        prompt = """You are a YouTube video summarizer. Please analyze the following transcript and create a comprehensive summary that includes:
+
+1. Main topic and key points
+2. Important details and examples
+3. Key takeaways or conclusions
+
+Format the summary in clear, bullet points. Keep it concise but informative, focusing on the most important information.
+
+Transcript:
+"""
+
+        # Format the response nicely
+        summary = gemini.invoke(prompt + transcript)
+        summary = summary.replace("•", "• ")  # Add space after bullet points
+        summary = summary.replace("\n\n", "\n")  # Remove extra newlines
+        
+        return summary
+
+    except Exception as e:
+        raise SummarizerError(f"Error generating summary: {str(e)}") from e
@@ -0,0 +1,526 @@
+"""Video lookups and transcript fetching.
+
+pytube and the YouTube Data API client are only used on fallback paths,
+so they are imported where they are needed rather than at module load.
+"""
+import os
+import re
+import threading
+import time
+import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from youtube_transcript_api import CouldNotRetrieveTranscript
+# youtube-transcript-api 0.6 opens a new session per call; its fetcher accepts our pooled one
+from youtube_transcript_api._transcripts import TranscriptList, TranscriptListFetcher
+
+from caches import get_caption_registry, get_transcript_cache, get_video_probe_cache
+from compact_transcript import CompactTranscript
+from errors import SummarizerError
+from metrics import count, in_current_context, span, timed
+
+# HTTP settings shared by every request to YouTube
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests made without one"""
+
+    def __init__(self, *args, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+@lru_cache(maxsize=1)
+def get_http_session() -> requests.Session:
+    """Return the keep-alive session, with retries and timeouts, used for YouTube requests"""
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def list_transcripts(video_id: str):
+    """List the caption tracks of a video through the shared session"""
+    return TranscriptListFetcher(get_http_session()).fetch(video_id)
+
+def extract_video_id(url: str) -> Optional[str]:
+    """Extract video ID from YouTube URL"""
+    patterns = [
+        r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([a-zA-Z0-9_-]+)',
+        r'(?:youtube\.com\/embed\/)([a-zA-Z0-9_-]+)',
+        r'(?:youtube\.com\/v\/)([a-zA-Z0-9_-]+)',
+        r'(?:youtube\.com\/e\/)([a-zA-Z0-9_-]+)',
+        r'(?:youtube\.com\/user\/[^\/]+\/)([a-zA-Z0-9_-]+)',
+        r'(?:youtube\.com\/[^\/]+\/live\/)([a-zA-Z0-9_-]+)',
+        r'(?:youtube\.com\/[^\/]+\/)([a-zA-Z0-9_-]+)'
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+def fetch_oembed(video_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch the oEmbed document of a video.
+
+    Returns None when the video does not exist and an empty dict when it
+    exists but YouTube withholds the metadata (oEmbed answers 401 for
+    videos that cannot be embedded).
+    """
+    response = get_http_session().get(
+        "https://www.youtube.com/oembed",
+        params={"url": f"https://www.youtube.com/watch?v={video_id}", "format": "json"}
+    )
+    if response.status_code in (400, 404):
+        return None
+    if response.status_code != 200:
+        return {}
+    try:
+        return response.json()
+    except ValueError:
+        return {}
+
+def check_video_availability(video_id: str) -> bool:
+    """Check if video exists and is accessible, using the small oEmbed document"""
+    try:
+        return fetch_oembed(video_id) is not None
+    except requests.RequestException:
+        return False
+
+LENGTH_SECONDS_PATTERN = re.compile(r'"lengthSeconds":"(\d+)"')
+
+def fetch_watch_page_metadata(video_id: str) -> Tuple[Optional[List[Dict[str, Any]]], Optional[int]]:
+    """Read caption tracks and duration from a single download of the watch page"""
+    fetcher = TranscriptListFetcher(get_http_session())
+    html = fetcher._fetch_video_html(video_id)
+
+    match = LENGTH_SECONDS_PATTERN.search(html)
+    duration = int(match.group(1)) if match else None
+
+    try:
+        transcript_list = TranscriptList.build(
+            get_http_session(),
+            video_id,
+            fetcher._extract_captions_json(html, video_id)
+        )
+    except CouldNotRetrieveTranscript:
+        return None, duration
+    languages = [
+        {
+            'code': transcript.language_code,
+            'name': transcript.language,
+            'is_generated': transcript.is_generated
+        }
+        for transcript in transcript_list
+    ]
+    return languages or None, duration
+
+@dataclass
+class VideoProbe:
+    """Pre-flight metadata of a video, collected once and reused by the whole pipeline"""
+    video_id: str
+    exists: bool
+    title: str
+    thumbnail: str
+    author: Optional[str] = None
+    duration: Optional[int] = None
+    caption_tracks: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def has_transcript(self) -> bool:
+        return bool(self.caption_tracks)
+
+def probe_video(video_id: str) -> VideoProbe:
+    """Collect existence, title, thumbnail, duration and caption tracks in one pass.
+
+    The oEmbed document and the watch page are requested concurrently and
+    successful probes are cached, so later stages never repeat them. The
+    transcript cache is only read by the transcript fetch, since the tracks
+    cached so far are not the full list of the video's tracks.
+    """
+    cache = get_video_probe_cache()
+    probe = cache.get(video_id)
+    count("cache_requests_total", cache="video_probe", result="hit" if probe is not None else "miss")
+    if probe is not None:
+        return probe
+
+    with span("probe_video"):
+        probe = run_video_probe(video_id)
+    if probe.exists and probe.has_transcript:
+        cache.set(video_id, probe)
+    return probe
+
+def run_video_probe(video_id: str) -> VideoProbe:
+    """Request the oEmbed document and the watch page concurrently and combine them"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        oembed_future = executor.submit(in_current_context(timed("check_video_availability", fetch_oembed)), video_id)
+        watch_future = executor.submit(in_current_context(timed("watch_page", fetch_watch_page_metadata)), video_id)
+
+    try:
+        oembed = oembed_future.result()
+    except requests.RequestException:
+        # A network failure is not proof that the video is missing
+        count("video_probe_errors_total", source="oembed")
+        oembed = {}
+
+    try:
+        caption_tracks, duration = watch_future.result()
+    except Exception:
+        count("video_probe_errors_total", source="watch_page")
+        caption_tracks, duration = None, None
+
+    registry = get_caption_registry()
+    if caption_tracks:
+        registry.set(video_id, caption_tracks)
+    elif oembed is not None:
+        # Fall back to the registry, pytube and the Data API
+        caption_tracks = get_available_languages(video_id)
+
+    return VideoProbe(
+        video_id=video_id,
+        exists=oembed is not None,
+        title=(oembed or {}).get('title') or f"Video ID: {video_id}",
+        thumbnail=(oembed or {}).get('thumbnail_url') or f"https://img.youtube.com/vi/{video_id}/0.jpg",
+        author=(oembed or {}).get('author_name'),
+        duration=duration,
+        caption_tracks=caption_tracks or []
+    )
+
+def invalidate_video_probe(video_id: str):
+    """Forget everything probed about a video so the next lookup starts fresh"""
+    get_video_probe_cache().invalidate(video_id)
+    invalidate_available_languages(video_id)
+
+def get_video_info(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Get video information from the pre-flight probe
+    """
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise SummarizerError("Invalid YouTube URL")
+
+    try:
+        probe = probe_video(video_id)
+        return {
+            'title': probe.title,
+            'thumbnail': probe.thumbnail,
+            'has_transcript': probe.has_transcript
+        }
+    except Exception as e:
+        raise SummarizerError(f"Error getting video info: {str(e)}") from e
+
+def get_available_languages(video_id) -> Optional[List[Dict[str, Any]]]:
+    """Get available caption languages, probing YouTube at most once per video"""
+    registry = get_caption_registry()
+    languages = registry.get(video_id)
+    count("cache_requests_total", cache="caption_registry", result="hit" if languages is not None else "miss")
+    if languages is None:
+        with span("language_probe"):
+            languages = probe_available_languages(video_id)
+        if languages:
+            registry.set(video_id, languages)
+    return languages
+
+def invalidate_available_languages(video_id: str):
+    """Drop the memoized caption tracks so the next lookup probes YouTube again"""
+    get_caption_registry().invalidate(video_id)
+
+def probe_available_languages(video_id):
+    """Get available caption languages using multiple methods"""
+    try:
+        # Method 1: Try YouTube Transcript API first (no API key needed)
+        try:
+            languages = list_transcripts(video_id)
+            available_languages = []
+            for transcript in languages:
+                available_languages.append({
+                    'code': transcript.language_code,
+                    'name': transcript.language,
+                    'is_generated': transcript.is_generated
+                })
+            if available_languages:
+                count("language_probe_total", source="transcript_api")
+                return available_languages
+        except Exception as e:
+            count("language_probe_errors_total", source="transcript_api")
+            print(f"YouTube Transcript API error: {str(e)}")
+            pass
+
+        # Method 2: Try pytube (no API key needed)
+        try:
+            from pytube import YouTube
+
+            yt = YouTube(f"https://www.youtube.com/watch?v={video_id}")
+            captions = yt.captions
+            if captions:
+                available_languages = []
+                # Iterating a CaptionQuery yields Caption objects, not codes
+                for caption in captions:
+                    is_generated = caption.code.startswith('a.')
+                    available_languages.append({
+                        'code': caption.code[2:] if is_generated else caption.code,
+                        'name': caption.name,
+                        'is_generated': is_generated
+                    })
+                if available_languages:
+                    count("language_probe_total", source="pytube")
+                    return available_languages
+        except Exception as e:
+            count("language_probe_errors_total", source="pytube")
+            print(f"Pytube error: {str(e)}")
+            pass
+
+        # Method 3: Try YouTube Data API as last resort
+        try:
+            api_key = os.getenv('YOUTUBE_API_KEY')
+            if api_key:
+                from googleapiclient.discovery import build
+
+                youtube = build('youtube', 'v3', developerKey=api_key)
+                request = youtube.captions().list(
+                    part="snippet",
+                    videoId=video_id
+                )
+                response = request.execute()
+                
+                if 'items' in response and response['items']:
+                    available_languages = []
+                    for item in response['items']:
+                        if 'snippet' in item and 'language' in item['snippet']:
+                            available_languages.append({
+                                'code': item['snippet']['language'],
+                                'name': item['snippet'].get('name', item['snippet']['language']),
+                                'is_generated': item['snippet'].get('trackKind', '') == 'ASR'
+                            })
+                    if available_languages:
+                        count("language_probe_total", source="data_api")
+                        return available_languages
+        except Exception as e:
+            count("language_probe_errors_total", source="data_api")
+            # googleapiclient HttpError carries the HTTP status on e.resp
+            status = getattr(getattr(e, 'resp', None), 'status', None)
+            if status == 403:
+                print("YouTube Data API is not enabled. Skipping this method.")
+            elif status == 404:
+                print("Video not found or captions not available")
+            else:
+                print(f"YouTube Data API error: {str(e)}")
+            pass
+
+        count("language_probe_total", source="none")
+        print("No captions available for this video")
+        return None
+
+    except Exception as e:
+        print(f"General error: {str(e)}")
+        return None
+
+# Transcript fetch settings
+# Start the pytube request if the transcript API has not answered after this many seconds
+TRANSCRIPT_HEDGE_DELAY = float(os.getenv("TRANSCRIPT_HEDGE_DELAY", "2.0"))
+# Give up on both paths after this many seconds
+TRANSCRIPT_DEADLINE = float(os.getenv("TRANSCRIPT_DEADLINE", "30.0"))
+
+def order_tracks(languages: List[Dict[str, Any]], language_code: Optional[str]) -> List[Dict[str, Any]]:
+    """Put the tracks of the requested language first, keeping the rest in order"""
+    if not language_code:
+        return list(languages)
+    return (
+        [lang for lang in languages if lang['code'] == language_code]
+        + [lang for lang in languages if lang['code'] != language_code]
+    )
+
+# A fetched track, its text and its timed segments
+FetchedTranscript = Tuple[Dict[str, Any], str, CompactTranscript]
+
+SRT_TIMESTAMP_PATTERN = re.compile(
+    r'(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})'
+)
+
+def parse_srt(srt: str) -> List[Dict[str, Any]]:
+    """Turn SRT captions into timed segments like the transcript API returns"""
+    segments = []
+    for block in re.split(r'\n\s*\n', srt.strip()):
+        lines = block.strip().splitlines()
+        for index, line in enumerate(lines):
+            match = SRT_TIMESTAMP_PATTERN.search(line)
+            if match:
+                parts = [int(part) for part in match.groups()]
+                start = parts[0] * 3600 + parts[1] * 60 + parts[2] + parts[3] / 1000
+                end = parts[4] * 3600 + parts[5] * 60 + parts[6] + parts[7] / 1000
+                text = " ".join(lines[index + 1:]).strip()
+                if text:
+                    segments.append({"text": text, "start": start, "duration": max(0.0, end - start)})
+                break
+    return segments
+
+def fetch_with_transcript_api(video_id: str, tracks: List[Dict[str, Any]],
+                              cancelled: threading.Event) -> Optional[FetchedTranscript]:
+    """Fetch the first track that works through youtube-transcript-api"""
+    transcript_list = list_transcripts(video_id)
+    for lang in tracks:
+        if cancelled.is_set():
+            return None
+        try:
+            segments = CompactTranscript.from_segments(transcript_list.find_transcript([lang['code']]).fetch())
+            # Same text as youtube_transcript_api's TextFormatter, one caption per line
+            return lang, segments.text, segments
+        except Exception:
+            continue
+    return None
+
+def fetch_with_pytube(video_id: str, tracks: List[Dict[str, Any]],
+                      cancelled: threading.Event) -> Optional[FetchedTranscript]:
+    """Fetch the first track that works through pytube's caption download"""
+    from pytube import YouTube
+
+    captions = YouTube(f"https://www.youtube.com/watch?v={video_id}").captions
+    for lang in tracks:
+        if cancelled.is_set():
+            return None
+        caption_code = f"a.{lang['code']}" if lang['is_generated'] else lang['code']
+        caption = captions.get(caption_code) or captions.get(lang['code'])
+        if caption is None:
+            continue
+        try:
+            srt = caption.generate_srt_captions()
+            segments = CompactTranscript.from_segments(parse_srt(srt))
+            # Use the segments' text when the SRT parsed, so the cache keeps the text once
+            return lang, segments.text if len(segments) else srt, segments
+        except Exception:
+            continue
+    return None
+
+def race_transcript_fetchers(video_id: str, tracks: List[Dict[str, Any]],
+                             hedge_delay: float = TRANSCRIPT_HEDGE_DELAY,
+                             deadline: float = TRANSCRIPT_DEADLINE) -> Optional[FetchedTranscript]:
+    """Race the transcript API against pytube as hedged requests.
+
+    The transcript API starts first; pytube joins once it fails or has not
+    answered within hedge_delay. The first valid transcript wins and the
+    other fetcher is told to stop. Returns None when both fail or the
+    deadline passes.
+    """
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=2)
+    started = time.monotonic()
+    try:
+        first = executor.submit(in_current_context(fetch_with_transcript_api), video_id, tracks, cancelled)
+        sources = {first: "transcript_api"}
+        pending = {first}
+        hedged = False
+        while pending:
+            if hedged:
+                timeout = deadline - (time.monotonic() - started)
+            else:
+                timeout = max(0.0, hedge_delay - (time.monotonic() - started))
+            done, pending = wait(pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception:
+                    count("transcript_fetch_errors_total", source=sources[future])
+                    result = None
+                if result and result[1]:
+                    count("transcript_source_total", source=sources[future])
+                    return result
+            if not hedged and (done or time.monotonic() - started >= hedge_delay):
+                hedge = executor.submit(in_current_context(fetch_with_pytube), video_id, tracks, cancelled)
+                sources[hedge] = "pytube"
+                pending.add(hedge)
+                hedged = True
+                count("transcript_hedged_total")
+            elif hedged and not done:
+                count("transcript_source_total", source="timeout")
+                return None
+        count("transcript_source_total", source="none")
+        return None
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def fetch_transcript(video_id: str, language_code: Optional[str] = None) -> FetchedTranscript:
+    """Download a transcript, requested language first, and store it with its timing in the cache
+
+    Raises SummarizerError when no transcript can be retrieved.
+    """
+    # Check if video exists and get its caption tracks
+    probe = probe_video(video_id)
+    if not probe.exists:
+        raise SummarizerError("Video not found or not accessible")
+    if not probe.caption_tracks:
+        raise SummarizerError("No captions available for this video")
+
+    with span("transcript_fetch"):
+        result = race_transcript_fetchers(video_id, order_tracks(probe.caption_tracks, language_code))
+    if result is None:
+        raise SummarizerError("Could not retrieve transcript for this video")
+
+    lang, transcript, segments = result
+    get_transcript_cache().set(video_id, lang['code'], lang['is_generated'], transcript, segments)
+    return result
+
+def get_video_transcript(url: str, language_code: Optional[str] = None) -> str:
+    """Get video transcript, fetching the requested language first
+
+    Raises SummarizerError when no transcript can be retrieved.
+    """
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise SummarizerError("Invalid YouTube URL")
+
+    try:
+        # Serve from the persistent cache before touching the network
+        cached = get_transcript_cache().get(video_id, language_code)
+        count("cache_requests_total", cache="transcript", result="hit" if cached else "miss")
+        if cached:
+            return cached
+        return fetch_transcript(video_id, language_code)[1]
+
+    except SummarizerError:
+        raise
+    except Exception as e:
+        raise SummarizerError("Error getting transcript") from e
+
+def get_video_segments(url: str, language_code: Optional[str] = None) -> CompactTranscript:
+    """Get the timed caption segments of a video, fetching the requested language first
+
+    Raises SummarizerError when no timed transcript can be retrieved.
+    """
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise SummarizerError("Invalid YouTube URL")
+
+    try:
+        cached = get_transcript_cache().get_segments(video_id, language_code)
+        count("cache_requests_total", cache="segments", result="hit" if cached else "miss")
+        if cached:
+            return cached
+        segments = fetch_transcript(video_id, language_code)[2]
+        if not segments:
+            raise SummarizerError("No caption timing available for this video")
+        return segments
+
+    except SummarizerError:
+        raise
+    except Exception as e:
+        raise SummarizerError("Error getting transcript") from e